@@ -13,6 +13,10 @@ def create_app(config_class=Config):
     bcrypt.init_app(app)
 
     # Register Blueprints
+    # Metrics first, so its request timer wraps the other blueprints' hooks
+    from app.metrics import bp as metrics_bp
+    app.register_blueprint(metrics_bp)
+
     from app.auth import bp as auth_bp
     app.register_blueprint(auth_bp)
     
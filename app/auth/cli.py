@@ -0,0 +1,16 @@
+import click
+from app.extensions import db
+from app.models import User
+from .routes import bp
+
+@bp.cli.command('set-admin')
+@click.argument('username')
+@click.option('--revoke', is_flag=True, help='Remove admin rights instead of granting them.')
+def set_admin(username, revoke):
+    """Grant (or revoke) admin rights for USERNAME."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f'No user named {username}')
+    user.is_admin = not revoke
+    db.session.commit()
+    click.echo(f"{username} is {'no longer' if revoke else 'now'} an admin")
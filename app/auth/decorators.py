@@ -0,0 +1,22 @@
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from app.extensions import db
+from app.models import User
+
+def is_admin(identity):
+    """True if the JWT identity belongs to a user with is_admin set"""
+    if identity is None:
+        return False
+    user = db.session.get(User, int(identity))
+    return user is not None and user.is_admin
+
+def admin_required(fn):
+    """Like jwt_required(), but the user must also have is_admin set"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        verify_jwt_in_request()
+        if not is_admin(get_jwt_identity()):
+            return jsonify({'error': 'Admin access required'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
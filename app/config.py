@@ -1,6 +1,84 @@
 import os
 
+basedir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-me'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Keep only the K nearest neighbors per movie instead of the full N x N
+    # collaborative matrix. 0 keeps the dense matrix. The content model is
+    # never cut to K: it keeps exact scores between the distinct genre
+    # strings (S x S), since K neighbors per movie would drop most of the
+    # movies that share its genres exactly.
+    RECOMMENDER_TOP_K = int(os.environ.get('RECOMMENDER_TOP_K', 0))
+
+    # Collaborative neighbor engine: 'exact' cosine, 'lsh' for approximate
+    # top-K neighbors from random-projection LSH (RECOMMENDER_TOP_K or 50
+    # neighbors), or 'svd' for cosine between rank-k latent item factors.
+    # More LSH tables or fewer bits per table raise recall and build time;
+    # see scripts/ann_report.py.
+    RECOMMENDER_COLLAB_ENGINE = os.environ.get('RECOMMENDER_COLLAB_ENGINE', 'exact')
+    RECOMMENDER_ANN_TABLES = int(os.environ.get('RECOMMENDER_ANN_TABLES', 16))
+    RECOMMENDER_ANN_BITS = int(os.environ.get('RECOMMENDER_ANN_BITS', 8))
+    RECOMMENDER_SVD_RANK = int(os.environ.get('RECOMMENDER_SVD_RANK', 64))
+
+    # Similarity builds run in row blocks of this many movies on this many
+    # threads (0 = one per CPU), so peak memory is about workers x block x N
+    # scores. With a spill directory the results are memory-mapped files
+    # there instead of RAM.
+    RECOMMENDER_BLOCK_SIZE = int(os.environ.get('RECOMMENDER_BLOCK_SIZE', 1024))
+    RECOMMENDER_BUILD_WORKERS = int(os.environ.get('RECOMMENDER_BUILD_WORKERS', 0))
+    RECOMMENDER_SPILL_DIR = os.environ.get('RECOMMENDER_SPILL_DIR') or None
+
+    # Opt-in: `flask recommender build` stores the top N hybrid
+    # recommendations of every movie in the movie_recommendation table, and
+    # /hybrid serves default-alpha requests from it while the version
+    # matches (0 = off). Run it from one build job, not per instance: each
+    # new version prunes all but the two newest from the table.
+    RECOMMENDER_MATERIALIZE_N = int(os.environ.get('RECOMMENDER_MATERIALIZE_N', 0))
+
+    # Versioned, memory-mapped model artifacts written by `flask recommender
+    # build`. Only worth running where this directory is storage the web
+    # instances read (see README); with no artifacts, each worker trains in
+    # the background after it starts serving.
+    RECOMMENDER_ARTIFACT_DIR = os.environ.get('RECOMMENDER_ARTIFACT_DIR') or os.path.join(basedir, 'model_artifacts')
+
+    # Seconds a request waits for the first background model build before
+    # answering 503, and how often workers look for newer artifacts (0 = never).
+    RECOMMENDER_STARTUP_WAIT = float(os.environ.get('RECOMMENDER_STARTUP_WAIT', 5))
+    RECOMMENDER_RELOAD_INTERVAL = float(os.environ.get('RECOMMENDER_RELOAD_INTERVAL', 60))
+
+    # Every worker polls the rating table this often and folds new or changed
+    # ratings into its live collaborative model, this many per batch. Only
+    # top-K collab indexes (RECOMMENDER_TOP_K > 0, 'exact' or 'lsh' engine)
+    # can be patched: with the default dense matrices, or 'svd', updates are
+    # OFF and new ratings wait for the next rebuild (counted as dropped in
+    # /api/recommend/status).
+    RECOMMENDER_UPDATE_BATCH_SIZE = int(os.environ.get('RECOMMENDER_UPDATE_BATCH_SIZE', 100))
+    RECOMMENDER_UPDATE_INTERVAL = float(os.environ.get('RECOMMENDER_UPDATE_INTERVAL', 5))
+
+    # Per-user recommendations are cached for this many users, for at most
+    # this many seconds; a user's own rating drops their entry right away.
+    RECOMMENDER_USER_CACHE_SIZE = int(os.environ.get('RECOMMENDER_USER_CACHE_SIZE', 10000))
+    RECOMMENDER_USER_CACHE_TTL = float(os.environ.get('RECOMMENDER_USER_CACHE_TTL', 300))
+
+    # Cache of /hybrid results keyed on (movie, limit, alpha, model version):
+    # 'memory' (per worker), 'sqlite' (one file shared by the workers on a
+    # host, at RECOMMENDER_CACHE_PATH) or 'none'.
+    RECOMMENDER_CACHE_BACKEND = os.environ.get('RECOMMENDER_CACHE_BACKEND', 'memory')
+    RECOMMENDER_CACHE_PATH = os.environ.get('RECOMMENDER_CACHE_PATH') or os.path.join(basedir, 'recommender_cache.sqlite')
+    RECOMMENDER_CACHE_SIZE = int(os.environ.get('RECOMMENDER_CACHE_SIZE', 2048))
+    RECOMMENDER_CACHE_TTL = float(os.environ.get('RECOMMENDER_CACHE_TTL', 600))
+
+    # Per-stage, per-route and SQL timings exposed in Prometheus text format
+    # at /metrics (per process; scrape each gunicorn worker).
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+    # cProfile captures of /api/recommend/hybrid and /api/movies/search, taken
+    # when an admin sends `X-Profile: 1` or for this share of all requests.
+    # The newest PROFILE_KEEP captures are kept in PROFILE_DIR.
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(basedir, 'profiles')
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 50))
@@ -0,0 +1,81 @@
+import time
+
+from flask import Blueprint, Response, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.services.metrics import db_query_seconds, registry, request_db_queries, request_seconds, requests_total
+from app.services.model_manager import model_manager
+
+bp = Blueprint('metrics', __name__)
+
+@bp.record
+def configure(state):
+    registry.enabled = state.app.config['METRICS_ENABLED']
+
+def current_endpoint():
+    """Route pattern of the current request, so label values stay bounded"""
+    if not has_request_context():
+        return 'background'
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+# --- Request latency ---
+@bp.before_app_request
+def start_request_timer():
+    if registry.enabled:
+        g.metrics_started = time.perf_counter()
+        g.db_queries = 0
+
+@bp.after_app_request
+def record_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        endpoint = current_endpoint()
+        labels = (request.method, endpoint, str(response.status_code))
+        request_seconds.observe(time.perf_counter() - started, *labels)
+        requests_total.inc(*labels)
+        request_db_queries.observe(g.pop('db_queries', 0), endpoint)
+    return response
+
+# --- SQL statements (every engine, including background model builds) ---
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if registry.enabled and context is not None:
+        context.metrics_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'metrics_started', None)
+    if started is None:
+        return
+    db_query_seconds.observe(time.perf_counter() - started, current_endpoint())
+    if has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+
+# --- Live model ---
+def model_memory():
+    service = model_manager.get()
+    if service is None:
+        return {}
+    return {(component,): nbytes for component, nbytes in service.memory_usage().items()}
+
+def model_build_seconds():
+    if model_manager.build_seconds is None:
+        return {}
+    return {(): model_manager.build_seconds}
+
+registry.gauge(
+    'recommender_model_memory_bytes', 'Bytes held by each component of the live model.',
+    ('component',), callback=model_memory,
+)
+registry.gauge(
+    'recommender_model_build_seconds', 'Duration of the last background model build.',
+    callback=model_build_seconds,
+)
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    if not registry.enabled:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
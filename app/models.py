@@ -6,6 +6,7 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
+    is_admin = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     ratings = db.relationship('Rating', backref='user', lazy='dynamic')
 
     def set_password(self, password):
@@ -30,10 +31,21 @@ class Movie(db.Model):
 
 class Rating(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), nullable=False)
     rating = db.Column(db.Float, nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def __repr__(self):
         return f'<Rating User:{self.user_id} Movie:{self.movie_id} Score:{self.rating}>'
+
+class MovieRecommendation(db.Model):
+    """Precomputed hybrid neighbors of a movie for one model version"""
+    model_version = db.Column(db.String(40), primary_key=True)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    rec_movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<MovieRecommendation Movie:{self.movie_id} #{self.rank} -> {self.rec_movie_id}>'
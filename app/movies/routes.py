@@ -1,28 +1,34 @@
+import base64
+import time
 from flask import Blueprint, request, jsonify
+from sqlalchemy import func, select
 from app.models import Movie, Rating
 from app.extensions import db
+from app.services.personalized import user_cache
+from app.services.profiling import profiled
+from app.services.search import search_titles
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 
 bp = Blueprint('movies', __name__, url_prefix='/api/movies')
 
 @bp.route('/search', methods=['GET'])
+@profiled('q')
 def search_movies():
     query = request.args.get('q', '', type=str)
     if not query or len(query) < 2:
         return jsonify({'error': 'Search query must be at least 2 characters'}), 400
         
-    # SQL based case-insensitive search
-    # Using 'ilike' for PostgreSQL, but for SQLite 'like' is case-insensitive by default usually, 
-    # but SQLAlchemy 'ilike' handles it cross-db.
-    results = Movie.query.filter(Movie.title.ilike(f'%{query}%')).limit(20).all()
+    # Relevance-ranked index lookup (FTS5 on SQLite, pg_trgm on Postgres)
+    # returning plain (id, title, genres) rows instead of ORM objects
+    results = search_titles(query, limit=20)
     
     movies_data = []
-    for movie in results:
+    for movie_id, title, genres in results:
         movies_data.append({
-            'id': movie.id,
-            'title': movie.title,
-            'genres': movie.genres
+            'id': movie_id,
+            'title': title,
+            'genres': genres
         })
         
     return jsonify({
@@ -31,8 +37,63 @@ def search_movies():
         'results': movies_data
     }), 200
 
+# Cached COUNT(*) for keyset pages that ask for a total: (value, monotonic time)
+_total_cache = {}
+TOTAL_CACHE_SECONDS = 60
+
+def encode_cursor(movie_id):
+    return base64.urlsafe_b64encode(str(movie_id).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return int(base64.urlsafe_b64decode(padded.encode()).decode())
+
+def cached_movie_total():
+    cached = _total_cache.get('movie')
+    if cached and time.monotonic() - cached[1] < TOTAL_CACHE_SECONDS:
+        return cached[0]
+    total = db.session.execute(select(func.count()).select_from(Movie)).scalar()
+    _total_cache['movie'] = (total, time.monotonic())
+    return total
+
+def get_movies_keyset():
+    """Cursor pagination: seek past the last id seen instead of OFFSET"""
+    limit = request.args.get('limit', 20, type=int)
+    limit = max(1, min(limit, 100))
+
+    after = request.args.get('after', '')
+    last_id = None
+    if after:
+        try:
+            last_id = decode_cursor(after)
+        except (ValueError, UnicodeDecodeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    stmt = select(Movie.id, Movie.title, Movie.genres).order_by(Movie.id).limit(limit + 1)
+    if last_id is not None:
+        stmt = stmt.where(Movie.id > last_id)
+    rows = db.session.execute(stmt).all()
+
+    # The extra row only tells us whether another page exists
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    movies_data = [{'id': movie_id, 'title': title, 'genres': genres} for movie_id, title, genres in rows]
+
+    response = {
+        'movies': movies_data,
+        'limit': limit,
+        'next_cursor': encode_cursor(rows[-1][0]) if has_more else None
+    }
+    if request.args.get('include_total', 0, type=int):
+        response['total'] = cached_movie_total()
+    return jsonify(response), 200
+
 @bp.route('', methods=['GET'])
 def get_movies():
+    # ?after=<cursor>&limit= selects keyset mode; ?page=&per_page= keeps offset mode
+    if 'after' in request.args or 'limit' in request.args:
+        return get_movies_keyset()
+
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     
@@ -98,5 +159,10 @@ def rate_movie(movie_id):
         message = 'Rating submitted'
         
     db.session.commit()
+
+    # Every worker folds the rating into its live model, and drops the
+    # user's cached lists, on its next poll of the rating table (see
+    # RatingUpdater); this worker drops its entry right away
+    user_cache.invalidate(int(current_user_id))
     
     return jsonify({'message': message, 'movie_id': movie_id, 'rating': score}), 200
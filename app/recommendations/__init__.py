@@ -1 +1,2 @@
 from .routes import bp
+from . import cli
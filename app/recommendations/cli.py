@@ -0,0 +1,57 @@
+import os
+import click
+from flask import current_app
+from app.services import artifacts
+from app.services.materialized import materialize
+from app.services.recommender import RecommendationService
+from .routes import bp
+
+def build_workers():
+    return current_app.config['RECOMMENDER_BUILD_WORKERS'] or os.cpu_count() or 1
+
+@bp.cli.command('build')
+@click.option('--out', 'artifact_dir', default=None, help='Artifact root (defaults to RECOMMENDER_ARTIFACT_DIR).')
+@click.option('--top-k', type=int, default=None, help='Neighbors kept per movie (defaults to RECOMMENDER_TOP_K).')
+@click.option('--collab-engine', default=None, help='Collaborative engine (defaults to RECOMMENDER_COLLAB_ENGINE).')
+@click.option('--if-missing', is_flag=True, help='Do nothing if a current artifact already exists.')
+@click.option('--materialize-n', type=int, default=None, help='Recommendations stored per movie (defaults to RECOMMENDER_MATERIALIZE_N, 0 skips).')
+def build(artifact_dir, top_k, collab_engine, if_missing, materialize_n):
+    """Train the recommender and write a new artifact version."""
+    artifact_dir = artifact_dir or current_app.config['RECOMMENDER_ARTIFACT_DIR']
+
+    existing = artifacts.current_version(artifact_dir)
+    if if_missing and existing:
+        click.echo(f'Artifacts already present ({existing}), skipping build.')
+        return
+
+    service = RecommendationService(top_k=top_k, collab_engine=collab_engine)
+    service.train_models()
+    path = artifacts.save_artifacts(service, artifact_dir)
+    click.echo(f'Wrote model version {service.version} to {path}')
+
+    if materialize_n is None:
+        materialize_n = current_app.config['RECOMMENDER_MATERIALIZE_N']
+    if materialize_n:
+        materialize(service, materialize_n, workers=build_workers())
+
+@bp.cli.command('materialize')
+@click.option('--n', 'n_recommendations', type=int, default=None, help='Recommendations stored per movie (defaults to RECOMMENDER_MATERIALIZE_N).')
+def materialize_command(n_recommendations):
+    """Store the current model's top recommendations in the movie_recommendation table."""
+    n_recommendations = n_recommendations or current_app.config['RECOMMENDER_MATERIALIZE_N']
+    if not n_recommendations:
+        raise click.UsageError('Pass --n or set RECOMMENDER_MATERIALIZE_N.')
+    service = RecommendationService()
+    service.ensure_ready()
+    materialize(service, n_recommendations, workers=build_workers())
+
+@bp.cli.command('info')
+@click.option('--out', 'artifact_dir', default=None, help='Artifact root (defaults to RECOMMENDER_ARTIFACT_DIR).')
+def info(artifact_dir):
+    """Show the active artifact version."""
+    artifact_dir = artifact_dir or current_app.config['RECOMMENDER_ARTIFACT_DIR']
+    version = artifacts.current_version(artifact_dir)
+    if not version:
+        click.echo(f'No artifacts in {artifact_dir}')
+        return
+    click.echo(f'{version} ({artifact_dir})')
@@ -1,38 +1,237 @@
-from flask import Blueprint, request, jsonify
-from app.services.recommender import recommender_service
-from app.models import Movie # For searching if needed
+import hashlib
+import json
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from app.auth.decorators import admin_required
+from app.extensions import db
+from app.services.cache import result_cache
+from app.services.model_manager import model_manager
+from app.services.incremental import rating_updater
+from app.services.materialized import DEFAULT_ALPHA, materialized_recommendations
+from app.services.metrics import timed
+from app.services.personalized import user_cache, user_ratings
+from app.services.profiling import profiled
+from app.models import Movie, User
 
-bp = Blueprint('recommendations', __name__, url_prefix='/api/recommend')
+bp = Blueprint('recommendations', __name__, url_prefix='/api/recommend', cli_group='recommender')
 
 @bp.before_app_request
 def initialize_recommender():
-    # Lazy initialization logic could go here, or just let the first request handle it.
-    pass
+    # Load or train the model in the background on the first request, pick
+    # up newer artifacts written by `flask recommender build`, and poll the
+    # rating table for ratings the live model has not seen yet.
+    app = current_app._get_current_object()
+    model_manager.ensure_started(app)
+    model_manager.maybe_refresh(app)
+    rating_updater.maybe_poll(app)
+
+# Seeds scored together in one /batch request
+MAX_BATCH_SEEDS = 100
+
+def get_service():
+    """Current model snapshot, waiting briefly for the first build to finish"""
+    service = model_manager.get()
+    if service is None:
+        service = model_manager.wait(current_app.config['RECOMMENDER_STARTUP_WAIT'])
+    return service
+
+def parse_filters(source):
+    """Filter arguments from query args or a JSON body; raises ValueError on bad input.
+
+    genres and exclude take comma separated values in a query string and
+    lists in JSON.
+    """
+    filters = {}
+    genres = source.get('genres')
+    if genres:
+        if isinstance(genres, str):
+            genres = [genre.strip() for genre in genres.split(',') if genre.strip()]
+        if not isinstance(genres, list) or not all(isinstance(genre, str) for genre in genres):
+            raise ValueError('genres must be a list of genre names')
+        filters['genres'] = genres
+
+    for name in ('min_year', 'max_year'):
+        value = source.get(name)
+        if value is None or value == '':
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(f'{name} must be an integer')
+        try:
+            filters[name] = int(value)
+        except ValueError:
+            raise ValueError(f'{name} must be an integer')
+
+    exclude = source.get('exclude')
+    if exclude:
+        if isinstance(exclude, str):
+            try:
+                exclude = [int(movie_id) for movie_id in exclude.split(',') if movie_id.strip()]
+            except ValueError:
+                raise ValueError('exclude must be a list of movie ids')
+        if not isinstance(exclude, list) or not all(isinstance(m, int) and not isinstance(m, bool) for m in exclude):
+            raise ValueError('exclude must be a list of movie ids')
+        filters['exclude_ids'] = exclude
+    return filters
+
+def filters_key(filters):
+    """Short cache key component for a set of filters"""
+    if not filters:
+        return ''
+    return hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:16]
+
+def model_not_ready():
+    response = jsonify({'error': 'Recommendation model is not ready yet', 'status': model_manager.status()})
+    response.headers['Retry-After'] = '5'
+    return response, 503
 
 @bp.route('/hybrid', methods=['GET'])
+@profiled('title')
 def recommend_hybrid():
     title = request.args.get('title')
     limit = request.args.get('limit', 10, type=int)
+    alpha = request.args.get('alpha', DEFAULT_ALPHA, type=float)
     
     if not title:
         return jsonify({'error': 'Title parameter is required'}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    if not 0 <= alpha <= 1:
+        return jsonify({'error': 'alpha must be between 0 and 1'}), 400
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # "Excluding what I've rated" needs to know who is asking
+    if request.args.get('exclude_rated') in ('1', 'true'):
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+        if user_id is None:
+            return jsonify({'error': 'exclude_rated requires a logged in user'}), 401
+        rated, _ = user_ratings(int(user_id))
+        filters['exclude_ids'] = filters.get('exclude_ids', []) + rated.tolist()
+
+    service = get_service()
+    if service is None:
+        return model_not_ready()
+
+    try:
+        allowed = service.filter_mask(**filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     try:
-        # Trigger training if not ready (Note: in production this happens at startup or background)
-        if not recommender_service.initialized:
-            recommender_service.train_models()
-            
-        result = recommender_service.get_recommendations(title, limit)
-        
-        # result can be an empty list if not found (legacy behavior fallback) or a dict
-        if isinstance(result, list):
-             # Should not happen with new logic unless truly empty, but handle strictly
-             return jsonify({'error': 'Movie not found'}), 404
-
-        return jsonify({
-            'input_movie': title,
-            'matched_movie': result['matched_title'],
-            'recommendations': result['recommendations']
-        })
+        matched = service.find_closest_title(title)
+        if not matched:
+            return jsonify({'error': 'Movie not found'}), 404
+
+        idx = service.movie_idx[matched]
+        key = f'{idx}:{limit}:{alpha}:{filters_key(filters)}'
+        recommendations = result_cache.get(key, service.model_version)
+        if recommendations is None:
+            # Precomputed rows when they match the live model, else score now
+            if alpha == DEFAULT_ALPHA and allowed is None:
+                recommendations = materialized_recommendations(service.model_version, int(service.id_index[idx]), limit)
+            if recommendations is None:
+                recommendations = service.get_recommendations(matched, limit, alpha, allowed)['recommendations']
+            result_cache.set(key, service.model_version, recommendations)
+
+        with timed('serialize'):
+            return jsonify({
+                'input_movie': title,
+                'matched_movie': matched,
+                'recommendations': recommendations
+            })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@bp.route('/batch', methods=['POST'])
+def recommend_batch():
+    data = request.get_json(silent=True) or {}
+    titles = data.get('titles') or []
+    movie_ids = data.get('movie_ids') or []
+    limit = data.get('limit', 10)
+
+    if not isinstance(titles, list) or not all(isinstance(t, str) for t in titles):
+        return jsonify({'error': 'titles must be a list of strings'}), 400
+    if not isinstance(movie_ids, list) or not all(isinstance(m, int) and not isinstance(m, bool) for m in movie_ids):
+        return jsonify({'error': 'movie_ids must be a list of integers'}), 400
+    if not titles and not movie_ids:
+        return jsonify({'error': 'titles or movie_ids is required'}), 400
+    if len(titles) + len(movie_ids) > MAX_BATCH_SEEDS:
+        return jsonify({'error': f'At most {MAX_BATCH_SEEDS} seeds per request'}), 400
+    if not isinstance(limit, int) or limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    try:
+        filters = parse_filters(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    service = get_service()
+    if service is None:
+        return model_not_ready()
+
+    try:
+        allowed = service.filter_mask(**filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        results = service.get_batch_recommendations(titles + movie_ids, limit, allowed=allowed)
+        with timed('serialize'):
+            return jsonify({'results': results})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def user_recommendations(user_id):
+    limit = request.args.get('limit', 10, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    service = get_service()
+    if service is None:
+        return model_not_ready()
+
+    try:
+        allowed = service.filter_mask(**filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        # Keyed on the base build: other users' incremental ratings do not
+        # invalidate the entry, this user's next rating does.
+        key = f'{limit}:{filters_key(filters)}'
+        recommendations = user_cache.get(user_id, key, service.version)
+        if recommendations is None:
+            movie_ids, ratings = user_ratings(user_id)
+            recommendations = service.get_user_recommendations(movie_ids, ratings, limit, allowed=allowed)
+            user_cache.put(user_id, key, service.version, recommendations)
+
+        with timed('serialize'):
+            return jsonify({'user_id': user_id, 'recommendations': recommendations})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/me', methods=['GET'])
+@jwt_required()
+def recommend_me():
+    return user_recommendations(int(get_jwt_identity()))
+
+@bp.route('/user/<int:user_id>', methods=['GET'])
+@admin_required
+def recommend_user(user_id):
+    if db.session.get(User, user_id) is None:
+        return jsonify({'error': 'User not found'}), 404
+    return user_recommendations(user_id)
+
+@bp.route('/status', methods=['GET'])
+def status():
+    status = model_manager.status()
+    status['updates'] = rating_updater.status()
+    status['result_cache'] = result_cache.status()
+    status['user_cache'] = user_cache.status()
+    return jsonify(status), 200
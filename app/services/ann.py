@@ -0,0 +1,143 @@
+import numpy as np
+from sklearn.preprocessing import normalize
+
+from app.services.similarity import TopKNeighbors
+
+
+def _expand_ranges(starts, stops):
+    """Positions covered by the half-open ranges [starts, stops), and the range each belongs to"""
+    lengths = stops - starts
+    owners = np.repeat(np.arange(lengths.size), lengths)
+    offsets = np.arange(owners.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[owners] + offsets, owners
+
+
+class RandomProjectionLSH:
+    """Approximate cosine neighbors through random-hyperplane LSH.
+
+    Each of `n_tables` hash tables maps an item to the sign pattern of its
+    projections on `n_bits` random hyperplanes, so items at a small angle
+    usually share a bucket. Rating vectors all sit in the positive orthant,
+    so the hyperplanes pass through the mean item direction rather than the
+    origin; otherwise most items land in the same few buckets. The
+    candidates of a query are the items in its bucket in any table, plus the
+    buckets one bit away when `multiprobe` is on, and they are re-ranked by
+    their exact cosine. More tables or fewer bits raise recall at the cost
+    of more candidates per query.
+    """
+
+    def __init__(self, n_tables=16, n_bits=8, multiprobe=False, seed=0):
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.multiprobe = multiprobe
+        self.seed = seed
+
+    def fit(self, matrix):
+        """Index the rows of a sparse (items x features) matrix"""
+        self._normed = normalize(matrix, norm='l2', axis=1).astype(np.float32).tocsr()
+        n_items, n_features = self._normed.shape
+        # Items without any ratings have no direction; keep them out of every bucket
+        self._empty = np.diff(self._normed.indptr) == 0
+
+        rng = np.random.default_rng(self.seed)
+        planes = rng.standard_normal((n_features, self.n_tables * self.n_bits)).astype(np.float32)
+        center = np.asarray(self._normed[~self._empty].mean(axis=0)).ravel().astype(np.float32)
+        bits = np.asarray(self._normed @ planes) > center @ planes
+        weights = np.left_shift(1, np.arange(self.n_bits, dtype=np.int64))
+        self._codes = (bits.reshape(n_items, self.n_tables, self.n_bits) * weights).sum(axis=2)
+
+        self._orders, self._sorted_codes = [], []
+        for table in range(self.n_tables):
+            order = np.argsort(self._codes[:, table], kind='stable')
+            order = order[~self._empty[order]]
+            self._orders.append(order)
+            self._sorted_codes.append(self._codes[order, table])
+        return self
+
+    @property
+    def n_items(self):
+        return self._normed.shape[0]
+
+    def _probes(self, codes):
+        """Bucket codes visited for each code: itself, then its 1-bit neighbors"""
+        if not self.multiprobe:
+            return codes[:, None]
+        flips = np.left_shift(1, np.arange(self.n_bits, dtype=np.int64))
+        return np.concatenate([codes[:, None], codes[:, None] ^ flips[None, :]], axis=1)
+
+    def candidate_pairs(self, items):
+        """Unique (query, candidate) pairs for a block of items"""
+        items = np.asarray(items, dtype=np.int64)
+        items = items[~self._empty[items]]
+        n_items = self.n_items
+
+        keys = []
+        for table in range(self.n_tables):
+            probes = self._probes(self._codes[items, table])
+            sorted_codes = self._sorted_codes[table]
+            starts = np.searchsorted(sorted_codes, probes.ravel(), side='left')
+            stops = np.searchsorted(sorted_codes, probes.ravel(), side='right')
+            positions, owners = _expand_ranges(starts, stops)
+            queries = items[owners // probes.shape[1]]
+            keys.append(queries * n_items + self._orders[table][positions])
+
+        keys = np.sort(np.concatenate(keys)) if keys else np.empty(0, dtype=np.int64)
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if keys.size else keys
+        return keys // n_items, keys % n_items
+
+    def candidates(self, idx):
+        """Items sharing a (probed) bucket with item `idx` in any table"""
+        return self.candidate_pairs([idx])[1]
+
+    def _rank(self, items, k):
+        """Exact cosine of every candidate pair, cut to the best `k` per query"""
+        queries, candidates = self.candidate_pairs(items)
+        # One sparse product between the block and its candidate union, then
+        # read the pairs out of it
+        query_items, query_pos = np.unique(queries, return_inverse=True)
+        union, candidate_pos = np.unique(candidates, return_inverse=True)
+        products = (self._normed[query_items] @ self._normed[union].T).tocsr()
+        products.sort_indices() # Binary search instead of a row scan per lookup
+        scores = np.asarray(products[query_pos, candidate_pos]).ravel()
+
+        # Group by query, best score first, lower index first on ties
+        order = np.lexsort((candidates, -scores, queries))
+        queries, candidates, scores = queries[order], candidates[order], scores[order]
+        group_starts = np.flatnonzero(np.r_[True, queries[1:] != queries[:-1]])
+        ranks = np.arange(queries.size) - np.repeat(group_starts, np.diff(np.r_[group_starts, queries.size]))
+        keep = ranks < k
+        return queries[keep], ranks[keep], candidates[keep], scores[keep]
+
+    def query(self, idx, k):
+        """(indices, scores) of the approximate top-`k` neighbors of item `idx`, best first"""
+        _, _, candidates, scores = self._rank([idx], k)
+        return candidates, scores.astype(np.float32)
+
+    def neighbors(self, k, block_size=512):
+        """TopKNeighbors for every indexed item, re-ranked `block_size` items at a time.
+
+        Rows with fewer than `k` candidates are padded with zero-score
+        entries pointing at items outside the candidate set.
+        """
+        n_items = self.n_items
+        k = min(k, n_items)
+        indices = np.full((n_items, k), -1, dtype=np.int64)
+        scores = np.zeros((n_items, k), dtype=np.float32)
+
+        for start in range(0, n_items, block_size):
+            queries, ranks, candidates, block_scores = self._rank(np.arange(start, min(start + block_size, n_items)), k)
+            indices[queries, ranks] = candidates
+            scores[queries, ranks] = block_scores
+
+        for idx in np.flatnonzero(indices[:, -1] < 0):
+            found = indices[idx][indices[idx] >= 0]
+            padding = np.setdiff1d(np.arange(k + found.size), found)[:k - found.size]
+            indices[idx, found.size:] = padding
+
+        return TopKNeighbors(indices.astype(np.int32), scores, n_items)
+
+
+def lsh_top_k_cosine(matrix, k, n_tables=16, n_bits=8, multiprobe=False, seed=0):
+    """Approximate counterpart of `top_k_cosine` built from an LSH index"""
+    index = RandomProjectionLSH(n_tables=n_tables, n_bits=n_bits, multiprobe=multiprobe, seed=seed)
+    return index.fit(matrix).neighbors(k)
@@ -0,0 +1,177 @@
+"""Persist a trained RecommendationService to disk and memory-map it back.
+
+Layout of an artifact root::
+
+    <root>/CURRENT                  name of the active version
+    <root>/<version>/manifest.json  shapes, similarity kinds, array names
+    <root>/<version>/<name>.npy     one plain (non-pickled) array per file
+
+Arrays are loaded with ``np.load(mmap_mode='r')`` so every gunicorn worker
+maps the same files and shares one page-cache copy.
+"""
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from app.services.similarity import SIMILARITY_KINDS, row_norms
+
+FORMAT_VERSION = 2
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+
+def current_version(root):
+    """Name of the active artifact version under `root`, or None"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    if version and os.path.isdir(os.path.join(root, version)):
+        return version
+    return None
+
+
+def _add_csr(arrays, prefix, matrix):
+    matrix = csr_matrix(matrix)
+    arrays[f'{prefix}_data'] = matrix.data
+    arrays[f'{prefix}_indices'] = matrix.indices
+    arrays[f'{prefix}_indptr'] = matrix.indptr
+    return {'shape': list(matrix.shape)}
+
+
+def _load_csr(load, prefix, meta):
+    return csr_matrix(
+        (load(f'{prefix}_data'), load(f'{prefix}_indices'), load(f'{prefix}_indptr')),
+        shape=tuple(meta['shape']),
+    )
+
+
+def _dump_mark(mark):
+    return None if mark is None else [mark[0].isoformat(), mark[1]]
+
+
+def _load_mark(value):
+    return None if value is None else (datetime.fromisoformat(value[0]), value[1])
+
+
+def _write_current(root, version):
+    # Write-then-rename so readers never see a half written pointer
+    fd, tmp_path = tempfile.mkstemp(prefix='.current-', dir=root)
+    with os.fdopen(fd, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def _prune(root, keep):
+    versions = sorted(
+        name for name in os.listdir(root)
+        if not name.startswith('.') and os.path.isdir(os.path.join(root, name))
+    )
+    active = current_version(root)
+    for name in versions[:-keep]:
+        if name != active:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def save_artifacts(service, root, keep=3):
+    """Write the trained state of `service` as a new version under `root`.
+
+    The version directory is assembled under a temporary name and renamed
+    into place before CURRENT is switched, so loaders never see a partial
+    build. Only the newest `keep` versions are retained.
+    """
+    version = service.version or datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+    arrays = {
+        'movie_ids': service.movies_df['id'].to_numpy(),
+        'titles': np.array(service.movies_df['title'].tolist(), dtype=str),
+        'genres': np.array(service.movies_df['genres'].tolist(), dtype=str),
+        'collab_user_ids': service.collab_user_ids,
+    }
+    manifest = {
+        'format': FORMAT_VERSION,
+        'version': version,
+        'created_at': datetime.utcnow().isoformat(),
+        'rating_mark': _dump_mark(service.rating_mark),
+        'matrices': {
+            'genre_matrix': _add_csr(arrays, 'genre_matrix', service.genre_matrix),
+            'movie_user_matrix': _add_csr(arrays, 'movie_user_matrix', service.movie_user_matrix),
+        },
+        'similarity': {},
+    }
+    for name, similarity in (('content', service.cosine_sim_content), ('collab', service.cosine_sim_collab)):
+        sim_arrays, meta = similarity.to_arrays()
+        meta['arrays'] = sorted(sim_arrays)
+        manifest['similarity'][name] = meta
+        for key, value in sim_arrays.items():
+            arrays[f'{name}_{key}'] = value
+
+    os.makedirs(root, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix='.build-', dir=root)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(build_dir, f'{name}.npy'), np.ascontiguousarray(array))
+        with open(os.path.join(build_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        target = os.path.join(root, version)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.rename(build_dir, target)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    _write_current(root, version)
+    _prune(root, keep)
+    return target
+
+
+def load_artifacts(service, root, version=None, mmap_mode='r'):
+    """Populate `service` from a saved version (CURRENT by default)"""
+    version = version or current_version(root)
+    if not version:
+        raise FileNotFoundError(f'No model artifacts found in {root}')
+
+    path = os.path.join(root, version)
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest['format'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {manifest['format']} in {path}")
+
+    def load(name):
+        return np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+
+    service.movies_df = pd.DataFrame({
+        'id': load('movie_ids'),
+        'title': load('titles').tolist(),
+        'genres': pd.Categorical(load('genres').tolist()),
+    })
+    service.ratings_df = None
+    service._index_movies()
+
+    service.collab_user_ids = load('collab_user_ids')
+
+    matrices = manifest['matrices']
+    service.genre_matrix = _load_csr(load, 'genre_matrix', matrices['genre_matrix'])
+    service.movie_user_matrix = _load_csr(load, 'movie_user_matrix', matrices['movie_user_matrix'])
+    service.collab_norms = row_norms(service.movie_user_matrix)
+    service._compute_priors()
+
+    for name, meta in manifest['similarity'].items():
+        sim_arrays = {key: load(f'{name}_{key}') for key in meta['arrays']}
+        similarity = SIMILARITY_KINDS[meta['kind']].from_arrays(sim_arrays, meta)
+        setattr(service, f'cosine_sim_{name}', similarity)
+
+    service.version = manifest['version']
+    service.revision = 0
+    # None for artifacts written before marks existed
+    service.rating_mark = _load_mark(manifest.get('rating_mark'))
+    service.initialized = True
+    return service
@@ -0,0 +1,207 @@
+"""Versioned result cache for recommendation responses.
+
+Entries are keyed on the request key plus the model version that produced
+them, so publishing a new snapshot (a rebuild or an incremental update)
+makes every older entry unreachable without an explicit flush. Two
+backends are available:
+
+    memory  an in-process LRU, private to each gunicorn worker
+    sqlite  a local SQLite file shared by every worker on the host
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class MemoryBackend:
+    """Size-bounded LRU dict. Values are stored as-is and must not be mutated."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (version, stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, version, value, stored_at):
+        with self._lock:
+            self._entries[key] = (version, stored_at, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def retire(self, version):
+        """Drop entries computed by any other model version"""
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[0] != version]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """LRU table in a local SQLite file (WAL mode) shared across processes.
+
+    Versions name the same model in every worker: the build version plus
+    the rating mark of the incremental updates applied to it. Old versions
+    are not retired eagerly: other workers may still be serving the
+    snapshot that produced them. They age out through LRU and TTL.
+    """
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS result_cache ('
+                'key TEXT NOT NULL, version TEXT NOT NULL, value TEXT NOT NULL, '
+                'stored_at REAL NOT NULL, used_at REAL NOT NULL, PRIMARY KEY (key, version))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_result_cache_used_at ON result_cache (used_at)')
+
+    def _connect(self):
+        # sqlite3 connections are not shareable between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, version):
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT stored_at, value FROM result_cache WHERE key = ? AND version = ?', (key, version)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            'UPDATE result_cache SET used_at = ? WHERE key = ? AND version = ?', (time.time(), key, version)
+        )
+        return row[0], json.loads(row[1])
+
+    def set(self, key, version, value, stored_at):
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO result_cache (key, version, value, stored_at, used_at) VALUES (?, ?, ?, ?, ?)',
+            (key, version, json.dumps(value), stored_at, time.time()),
+        )
+        excess = conn.execute('SELECT COUNT(*) FROM result_cache').fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return 0
+        conn.execute(
+            'DELETE FROM result_cache WHERE rowid IN '
+            '(SELECT rowid FROM result_cache ORDER BY used_at LIMIT ?)', (excess,)
+        )
+        return excess
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM result_cache WHERE key = ?', (key,))
+
+    def retire(self, version):
+        pass
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM result_cache').fetchone()[0]
+
+
+def make_backend(config):
+    """Cache backend selected by RECOMMENDER_CACHE_BACKEND, or None when disabled"""
+    name = config['RECOMMENDER_CACHE_BACKEND']
+    size = config['RECOMMENDER_CACHE_SIZE']
+    if name == 'none' or size <= 0:
+        return None
+    if name == 'memory':
+        return MemoryBackend(size)
+    if name == 'sqlite':
+        return SQLiteBackend(config['RECOMMENDER_CACHE_PATH'], size)
+    raise ValueError(f'Unknown RECOMMENDER_CACHE_BACKEND {name!r}')
+
+
+class ResultCache:
+    """LRU + TTL cache of recommendation lists, tagged with the model version.
+
+    The backend is created from the app config on first use. Hit, miss and
+    eviction counters are per process.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._configured = False
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_backend(self):
+        if not self._configured:
+            with self._lock:
+                if not self._configured:
+                    self._backend = make_backend(current_app.config)
+                    self._configured = True
+        return self._backend
+
+    def get(self, key, version):
+        backend = self._get_backend()
+        if backend is None:
+            return None
+
+        if version != self._version:
+            # A new snapshot went live in this process
+            self._version = version
+            backend.retire(version)
+
+        entry = backend.get(key, version)
+        if entry is not None and time.time() - entry[0] > current_app.config['RECOMMENDER_CACHE_TTL']:
+            backend.delete(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, version, value):
+        backend = self._get_backend()
+        if backend is None:
+            return
+        self.evictions += backend.set(key, version, value, time.time())
+
+    def status(self):
+        backend = self._get_backend()
+        return {
+            'backend': current_app.config['RECOMMENDER_CACHE_BACKEND'] if backend is not None else 'none',
+            'size': len(backend) if backend is not None else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+# Singleton Instance
+result_cache = ResultCache()
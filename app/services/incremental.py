@@ -0,0 +1,224 @@
+import copy
+import threading
+import time
+
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from sqlalchemy import and_, or_, select
+
+from app.extensions import db
+from app.models import Rating
+from app.services.model_manager import model_manager
+from app.services.personalized import user_cache
+from app.services.recommender import settled_cutoff, settled_rating_mark
+from app.services.similarity import TopKNeighbors, row_norms
+
+
+def supports_incremental(service):
+    """Incremental updates patch the top-K collab index; dense matrices need a rebuild"""
+    return isinstance(service.cosine_sim_collab, TopKNeighbors)
+
+
+def ratings_after(mark, limit):
+    """Up to `limit` settled ratings written or changed after `mark`, oldest first.
+
+    Returns the (user_id, movie_id, rating) rows and the mark of the last one
+    (`mark` itself when there are none).
+    """
+    timestamp, rating_id = mark
+    rows = db.session.execute(
+        select(Rating.timestamp, Rating.id, Rating.user_id, Rating.movie_id, Rating.rating)
+        .where(
+            Rating.timestamp <= settled_cutoff(),
+            or_(Rating.timestamp > timestamp, and_(Rating.timestamp == timestamp, Rating.id > rating_id)),
+        )
+        .order_by(Rating.timestamp, Rating.id)
+        .limit(limit)
+    ).all()
+    if not rows:
+        return [], mark
+    return [(user_id, movie_id, rating) for _, _, user_id, movie_id, rating in rows], tuple(rows[-1][:2])
+
+
+def apply_ratings(service, ratings, mark):
+    """Return a new snapshot of `service` with `ratings` folded into the collab model.
+
+    `ratings` is an iterable of (user_id, movie_id, rating); a later entry
+    for the same (user, movie) wins. The snapshot records `mark` as the
+    rating position it is up to date with. Only the item rows touched by
+    the batch are re-scored: their vectors and norms are patched in the movie x user
+    matrix, their similarities to every item are recomputed with one sparse
+    product, and the neighbor index is updated around them. Users seen for
+    the first time get a new column. `service` itself is not modified.
+    """
+    matrix = service.movie_user_matrix
+    n_rows, n_cols = matrix.shape
+    user_cols = {user_id: j for j, user_id in enumerate(service.collab_user_ids.tolist())}
+    new_users = []
+    rows, cols, values = [], [], []
+
+    latest = {(user_id, movie_id): rating for user_id, movie_id, rating in ratings}
+    ratings = [(user_id, movie_id, rating) for (user_id, movie_id), rating in latest.items()]
+    movie_rows = service.id_index.get_indexer([movie_id for _, movie_id, _ in ratings])
+    for (user_id, _, rating), row in zip(ratings, movie_rows):
+        if row < 0:
+            continue # Movie added after this snapshot was built
+        col = user_cols.get(user_id)
+        if col is None:
+            col = n_cols + len(new_users)
+            user_cols[user_id] = col
+            new_users.append(user_id)
+        rows.append(row)
+        cols.append(col)
+        values.append(rating)
+
+    if not rows:
+        snapshot = copy.copy(service)
+        snapshot.rating_mark = mark
+        return snapshot
+
+    shape = (n_rows, n_cols + len(new_users))
+    updated = csr_matrix(matrix, dtype=np.float32, copy=True)
+    updated.resize(shape)
+    rows, cols = np.array(rows), np.array(cols)
+    old_values = np.asarray(updated[rows, cols]).ravel()
+    delta = coo_matrix((np.array(values) - old_values, (rows, cols)), shape=shape)
+    updated = (updated + delta).tocsr()
+    updated.eliminate_zeros()
+
+    affected = np.unique(rows)
+    norms = np.array(service.collab_norms, dtype=np.float64)
+    norms[affected] = row_norms(updated[affected])
+
+    # Cosine of every touched item against all items in one sparse product
+    dots = (updated[affected] @ updated.T).toarray()
+    denom = norms[affected][:, None] * norms[None, :]
+    item_scores = np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0).astype(np.float32)
+
+    snapshot = copy.copy(service)
+    snapshot.movie_user_matrix = updated
+    snapshot.collab_norms = norms
+    snapshot.cosine_sim_collab = service.cosine_sim_collab.updated(affected, item_scores)
+    snapshot.collab_user_ids = np.concatenate(
+        [service.collab_user_ids, np.array(new_users, dtype=service.collab_user_ids.dtype)]
+    )
+    snapshot._compute_priors()
+    snapshot.revision = service.revision + 1
+    snapshot.rating_mark = mark
+    return snapshot
+
+
+class RatingUpdater:
+    """Folds new and changed ratings from the rating table into the live model.
+
+    Every RECOMMENDER_UPDATE_INTERVAL seconds a background thread reads the
+    ratings past the live snapshot's rating mark, up to
+    RECOMMENDER_UPDATE_BATCH_SIZE at a time, and publishes a snapshot with
+    them applied. Reading the table rather than this worker's own writes
+    means every gunicorn worker applies the same ratings, whichever worker
+    took the POST. A snapshot published by a build in the meantime wins and
+    is caught up from its own mark on the next poll.
+
+    Dense collab matrices cannot be patched; their ratings wait for the next
+    rebuild and are counted as dropped, as are ratings of movies the
+    snapshot does not know. Either way each rater's cached personal
+    recommendations are dropped in this worker.
+    """
+
+    def __init__(self, manager):
+        self._manager = manager
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_poll = 0.0
+        self._service = None # Snapshot `_mark` belongs to
+        self._mark = None
+        self.applied = 0
+        self.batches = 0
+        self.dropped = 0
+        self.last_error = None
+
+    def maybe_poll(self, app):
+        """Read new ratings in the background if the poll interval has passed"""
+        with self._lock:
+            now = time.monotonic()
+            if (
+                now - self._last_poll < app.config['RECOMMENDER_UPDATE_INTERVAL']
+                or (self._thread is not None and self._thread.is_alive())
+            ):
+                return
+            self._last_poll = now
+            self._thread = threading.Thread(
+                target=self.poll, args=(app,), name='recommender-updates', daemon=True
+            )
+            self._thread.start()
+
+    def _mark_for(self, service):
+        if service is not self._service:
+            self._service = service
+            # Artifacts written before marks existed start from now
+            self._mark = service.rating_mark or settled_rating_mark()
+        return self._mark
+
+    def poll(self, app):
+        """Apply every settled rating past the live snapshot's mark, batch by batch"""
+        batch_size = app.config['RECOMMENDER_UPDATE_BATCH_SIZE']
+        with app.app_context():
+            try:
+                while self._poll_batch(app, batch_size) >= batch_size:
+                    pass
+            finally:
+                db.session.remove()
+
+    def _poll_batch(self, app, batch_size):
+        """Read and apply one batch; returns the number of ratings read"""
+        service = self._manager.get()
+        if service is None or self._manager.building:
+            return 0 # The build in progress reads these ratings from the database
+
+        ratings, mark = ratings_after(self._mark_for(service), batch_size)
+        if not ratings:
+            return 0
+
+        # The worker that took each POST already dropped its own entry;
+        # this reaches the user's cached lists in every other worker
+        for user_id in {user_id for user_id, _, _ in ratings}:
+            user_cache.invalidate(user_id)
+
+        if not supports_incremental(service):
+            self._mark = mark
+            self.dropped += len(ratings)
+            return len(ratings)
+
+        try:
+            snapshot = apply_ratings(service, ratings, mark)
+        except Exception as e:
+            app.logger.exception('Incremental recommender update failed')
+            self.last_error = str(e)
+            return 0
+
+        if not self._manager.publish(snapshot, expected=service):
+            return 0 # A build went live; the next poll starts from its mark
+        unknown = service.id_index.get_indexer([movie_id for _, movie_id, _ in ratings]) < 0
+        self.dropped += int(unknown.sum())
+        self.applied += len(ratings) - int(unknown.sum())
+        self.batches += 1
+        self.last_error = None
+        return len(ratings)
+
+    def status(self):
+        service = self._manager.get()
+        mark = None
+        if service is not None:
+            mark = self._mark if service is self._service else service.rating_mark
+        return {
+            'enabled': service is not None and supports_incremental(service),
+            'rating_mark': {'timestamp': mark[0].isoformat(), 'id': mark[1]} if mark else None,
+            'applied': self.applied,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'last_error': self.last_error,
+        }
+
+
+# Singleton Instance
+rating_updater = RatingUpdater(model_manager)
@@ -0,0 +1,110 @@
+"""Precomputed top-N hybrid recommendations in the movie_recommendation table.
+
+`materialize` scores every canonical movie at the default alpha in
+parallel row blocks and writes the top N per movie, tagged with the model
+version, in one transaction. `/api/recommend/hybrid` then answers default
+requests with one primary-key lookup while the live model has that same
+version; after a rebuild or an incremental update the rows are stale and
+requests fall back to scoring in memory until the job runs again.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, select
+
+from app.extensions import db
+from app.models import Movie, MovieRecommendation
+from app.services.recommender import BATCH_BLOCK_ITEMS
+from app.services.similarity import run_blocks
+
+# The alpha /hybrid uses when the request does not set one
+DEFAULT_ALPHA = 0.5
+
+# Versions kept in the table: the new one, and the previous one for workers
+# that have not swapped to the new model yet
+KEEP_VERSIONS = 2
+
+INSERT_CHUNK = 20000
+
+# Seconds before re-checking a version that had no rows
+MISSING_RECHECK = 30
+
+_present = {} # model version -> (has rows, checked at)
+
+
+def materialize(service, n_recommendations, workers=1):
+    """Write the top `n_recommendations` for every movie of `service`; returns rows written"""
+    started = time.perf_counter()
+    rows = np.flatnonzero(service.canonical_mask)
+    movie_ids = service.movies_df['id'].to_numpy()
+    n = min(n_recommendations, len(service.movies_df))
+    best = np.full((rows.size, n), -1, dtype=np.int64)
+    scores = np.zeros((rows.size, n), dtype=np.float64)
+
+    def fill_block(start, stop):
+        ranked = service._rank_rows(rows[start:stop], n, DEFAULT_ALPHA)
+        for pos, (indices, row_scores) in enumerate(ranked, start):
+            best[pos, :indices.size] = indices
+            scores[pos, :indices.size] = row_scores
+
+    # Same cache-sized blocks as batch requests
+    run_blocks(fill_block, rows.size, max(1, BATCH_BLOCK_ITEMS // len(service.movies_df)), workers)
+    print(f"Scored {rows.size} movies in {time.perf_counter() - started:.2f}s")
+
+    present = best >= 0
+    movie_pos, ranks = np.nonzero(present)
+    version = service.model_version
+    frame = pd.DataFrame({
+        'model_version': version,
+        'movie_id': movie_ids[rows[movie_pos]].astype(np.int64),
+        'rank': ranks + 1,
+        'rec_movie_id': movie_ids[best[present]].astype(np.int64),
+        'score': scores[present],
+    })
+
+    table = MovieRecommendation.__table__
+    # One transaction, so readers see all of a version or none of it
+    with db.engine.begin() as conn:
+        conn.execute(delete(table).where(table.c.model_version == version))
+        for start in range(0, len(frame), INSERT_CHUNK):
+            conn.execute(table.insert(), frame.iloc[start:start + INSERT_CHUNK].to_dict('records'))
+
+        versions = conn.execute(select(table.c.model_version).distinct()).scalars().all()
+        stale = sorted(versions, reverse=True)[KEEP_VERSIONS:]
+        if stale:
+            conn.execute(delete(table).where(table.c.model_version.in_(stale)))
+
+    _present.pop(version, None)
+    print(f"Wrote {len(frame)} recommendations for version {version} in {time.perf_counter() - started:.2f}s")
+    return len(frame)
+
+
+def has_version(version):
+    """Whether the table holds rows for `version` (misses are re-checked every MISSING_RECHECK seconds)"""
+    cached = _present.get(version)
+    if cached is not None and (cached[0] or time.monotonic() - cached[1] < MISSING_RECHECK):
+        return cached[0]
+    found = db.session.execute(
+        select(MovieRecommendation.movie_id).where(MovieRecommendation.model_version == version).limit(1)
+    ).first() is not None
+    _present.clear() # Only the live version is ever asked about
+    _present[version] = (found, time.monotonic())
+    return found
+
+
+def materialized_recommendations(version, movie_id, limit):
+    """Precomputed recommendations for a movie, or None if the table cannot answer"""
+    if limit <= 0 or not has_version(version):
+        return None
+    rows = db.session.execute(
+        select(Movie.title, MovieRecommendation.score)
+        .join(Movie, Movie.id == MovieRecommendation.rec_movie_id)
+        .where(MovieRecommendation.model_version == version, MovieRecommendation.movie_id == movie_id)
+        .order_by(MovieRecommendation.rank)
+        .limit(limit)
+    ).all()
+    # Fewer rows than asked for: the job kept a smaller N than this request wants
+    if len(rows) < limit:
+        return None
+    return [{'title': title, 'score': score} for title, score in rows]
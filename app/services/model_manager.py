@@ -0,0 +1,133 @@
+import threading
+import time
+from datetime import datetime
+
+from app.services import artifacts
+from app.services.recommender import RecommendationService
+
+
+class ModelManager:
+    """Owns the live RecommendationService and rebuilds it off the request path.
+
+    A published snapshot is never mutated. A rebuild prepares a brand new
+    RecommendationService in a background thread and then replaces the
+    reference in a single assignment, so requests keep reading the previous
+    snapshot until the new one is complete. Only one build runs at a time.
+    """
+
+    IDLE = 'idle'
+    BUILDING = 'building'
+    FAILED = 'failed'
+
+    # Seconds to wait before retrying a failed first build
+    RETRY_AFTER = 30
+
+    def __init__(self, factory=RecommendationService):
+        self._factory = factory
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_refresh_check = 0.0
+        self._failed_at = None
+        self.state = self.IDLE
+        self.last_error = None
+        self.built_at = None
+        self.build_seconds = None
+        self.builds = 0
+
+    def get(self):
+        """The current model snapshot, or None before the first build completes"""
+        return self._snapshot
+
+    @property
+    def building(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start_build(self, app):
+        """Start a background build unless one is already running.
+
+        The build loads the current artifacts, training from the database
+        only if there are none. Returns True if this call started a build.
+        """
+        with self._lock:
+            if self.building:
+                return False
+            self.state = self.BUILDING
+            self._thread = threading.Thread(
+                target=self._build, args=(app,), name='recommender-build', daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def _build(self, app):
+        started = time.perf_counter()
+        try:
+            with app.app_context():
+                service = self._factory()
+                service.ensure_ready()
+        except Exception as e:
+            app.logger.exception('Recommender build failed')
+            self.last_error = str(e)
+            self._failed_at = time.monotonic()
+            self.state = self.FAILED
+            return
+
+        # Atomic reference swap: readers see either the old or the new model
+        with self._lock:
+            self._snapshot = service
+        self.build_seconds = time.perf_counter() - started
+        self.built_at = datetime.utcnow()
+        self.builds += 1
+        self.last_error = None
+        self.state = self.IDLE
+
+    def publish(self, service, expected):
+        """Swap in `service` only if `expected` is still the live snapshot"""
+        with self._lock:
+            if self._snapshot is not expected:
+                return False
+            self._snapshot = service
+            return True
+
+    def ensure_started(self, app):
+        """Kick off the first build if there is no snapshot yet"""
+        if self._snapshot is not None or self.building:
+            return
+        if self._failed_at is not None and time.monotonic() - self._failed_at < self.RETRY_AFTER:
+            return
+        self.start_build(app)
+
+    def maybe_refresh(self, app):
+        """Hot-swap in a newer artifact version written by `flask recommender build`"""
+        interval = app.config.get('RECOMMENDER_RELOAD_INTERVAL', 0)
+        now = time.monotonic()
+        if not interval or self._snapshot is None or now - self._last_refresh_check < interval:
+            return
+        self._last_refresh_check = now
+
+        version = artifacts.current_version(app.config['RECOMMENDER_ARTIFACT_DIR'])
+        if version and version != self._snapshot.version:
+            self.start_build(app)
+
+    def wait(self, timeout=None):
+        """Block until the running build (if any) finishes; returns the snapshot"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self._snapshot
+
+    def status(self):
+        snapshot = self._snapshot
+        return {
+            'ready': snapshot is not None,
+            'version': snapshot.model_version if snapshot is not None else None,
+            'state': self.state,
+            'built_at': self.built_at.isoformat() if self.built_at else None,
+            'build_seconds': self.build_seconds,
+            'builds': self.builds,
+            'last_error': self.last_error,
+        }
+
+
+# Singleton Instance
+model_manager = ModelManager()
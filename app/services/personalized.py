@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Rating
+
+
+def user_ratings(user_id):
+    """(movie_ids, ratings) arrays of everything `user_id` has rated"""
+    rows = db.session.execute(
+        select(Rating.movie_id, Rating.rating).where(Rating.user_id == user_id)
+    ).all()
+    movie_ids = np.array([movie_id for movie_id, _ in rows], dtype=np.int64)
+    ratings = np.array([rating for _, rating in rows], dtype=np.float64)
+    return movie_ids, ratings
+
+
+class UserRecommendationCache:
+    """LRU cache of per-user recommendation lists.
+
+    Entries are tagged with the model build they were computed from and
+    expire after RECOMMENDER_USER_CACHE_TTL seconds. Incremental updates from
+    other users' ratings do not invalidate them; the user's own rating does,
+    through `invalidate`. The cache is per process, so the TTL bounds how
+    long another gunicorn worker can serve a list that predates a rating.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict() # user_id -> {key: (version, stored_at, value)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, key, version):
+        ttl = current_app.config['RECOMMENDER_USER_CACHE_TTL']
+        with self._lock:
+            entry = self._entries.get(user_id, {}).get(key)
+            if entry is None or entry[0] != version or time.monotonic() - entry[1] > ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, user_id, key, version, value):
+        max_users = current_app.config['RECOMMENDER_USER_CACHE_SIZE']
+        with self._lock:
+            self._entries.setdefault(user_id, {})[key] = (version, time.monotonic(), value)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def status(self):
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Singleton Instance
+user_cache = UserRecommendationCache()
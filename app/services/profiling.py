@@ -0,0 +1,117 @@
+"""Opt-in cProfile capture for individual requests.
+
+A view wrapped in `profiled` runs under cProfile when an admin sends
+`X-Profile: 1`, or for a random PROFILE_SAMPLE_RATE share of requests.
+Each capture is written to PROFILE_DIR as a .pstats file, next to a .json
+file with the route, the input, the model version and the timing. Only
+the newest PROFILE_KEEP captures are kept.
+
+    python -m pstats profiles/<id>.pstats
+"""
+import cProfile
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+from app.auth.decorators import is_admin
+from app.services.model_manager import model_manager
+
+PROFILE_HEADER = 'X-Profile'
+
+# One capture at a time: a second concurrent request just runs unprofiled.
+# Python 3.12+ allows a single active profiler per process anyway.
+_capture_lock = threading.Lock()
+
+
+def _requested_by_admin():
+    if request.headers.get(PROFILE_HEADER) != '1':
+        return False
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return False
+    return is_admin(get_jwt_identity())
+
+
+def _trigger():
+    """'header', 'sample' or None for a request that is not profiled"""
+    if _requested_by_admin():
+        return 'header'
+    rate = current_app.config['PROFILE_SAMPLE_RATE']
+    if rate > 0 and random.random() < rate:
+        return 'sample'
+    return None
+
+
+def _prune(directory, keep):
+    """Delete all but the newest `keep` captures"""
+    captures = sorted(name for name in os.listdir(directory) if name.endswith('.pstats'))
+    for name in captures[:max(len(captures) - keep, 0)]:
+        for path in (name, name[:-len('.pstats')] + '.json'):
+            try:
+                os.remove(os.path.join(directory, path))
+            except FileNotFoundError:
+                pass # Another worker pruned it first
+
+
+def _save(profiler, meta):
+    config = current_app.config
+    directory = config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+
+    route = re.sub(r'[^A-Za-z0-9]+', '-', meta['route']).strip('-')
+    # Timestamp first so names sort oldest to newest across workers
+    profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{os.getpid()}-{route}"
+    profiler.dump_stats(os.path.join(directory, f'{profile_id}.pstats'))
+    with open(os.path.join(directory, f'{profile_id}.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    _prune(directory, config['PROFILE_KEEP'])
+    return profile_id
+
+
+def profiled(input_arg):
+    """Profile the view on demand, tagging captures with request.args[input_arg]"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            trigger = _trigger()
+            if trigger is None or not _capture_lock.acquire(blocking=False):
+                return fn(*args, **kwargs)
+
+            try:
+                profiler = cProfile.Profile()
+                started = time.perf_counter()
+                profiler.enable()
+                try:
+                    response = current_app.make_response(fn(*args, **kwargs))
+                finally:
+                    profiler.disable()
+                seconds = time.perf_counter() - started
+            finally:
+                _capture_lock.release()
+
+            service = model_manager.get()
+            profile_id = _save(profiler, {
+                'route': request.url_rule.rule,
+                'input': request.args.get(input_arg),
+                'model_version': service.model_version if service is not None else None,
+                'trigger': trigger,
+                'status': response.status_code,
+                'seconds': seconds,
+                'created_at': datetime.utcnow().isoformat(),
+            })
+            response.headers['X-Profile-Id'] = profile_id
+            return response
+        return wrapper
+    return decorator
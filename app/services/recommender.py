@@ -1,88 +1,346 @@
+import hashlib
+import os
+import time
+import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
+from datetime import datetime, timedelta
 from sklearn.feature_extraction.text import CountVectorizer
 from scipy.sparse import csr_matrix
+from flask import current_app
 from app.models import Movie, Rating
 from app.extensions import db
-from sqlalchemy import text
+from app.services import artifacts
+from app.services.ann import lsh_top_k_cosine
+from app.services.metrics import timed
+from app.services.scoring import hybrid_scores, top_n, top_n_rows
+from app.services.title_matcher import TitleMatcher
+from app.services.similarity import dense_cosine, row_norms, signature_cosine, svd_factors, top_k_cosine
+from sqlalchemy import select, text
+
+# Neighbors kept by approximate engines when RECOMMENDER_TOP_K is 0
+ANN_DEFAULT_K = 50
+
+# Score cells computed per block in batch requests
+BATCH_BLOCK_ITEMS = 1 << 16
+
+# Pseudo-count of the Bayesian average rating: each movie's mean is pulled
+# toward the global mean as if it had this many extra average ratings
+PRIOR_RATINGS = 10
+
+# Ratings are stamped before their transaction commits, so a newer rating
+# can become visible after an older one. Rating marks stay this many
+# seconds behind the clock so no commit lands behind them.
+RATING_SETTLE_SECONDS = 2
+
+# Rating mark of a model built from an empty rating table
+NO_RATINGS = (datetime.min, 0)
+
+# Release year at the end of a MovieLens title: "Heat (1995)"
+TITLE_YEAR = r'\((\d{4})\)\s*$'
+
+def frame_mb(frame):
+    """Resident size of a DataFrame in megabytes"""
+    return frame.memory_usage(deep=True).sum() / 1e6
+
+def settled_cutoff():
+    """Newest rating timestamp that is safe to put a rating mark at"""
+    return datetime.utcnow() - timedelta(seconds=RATING_SETTLE_SECONDS)
+
+def settled_rating_mark():
+    """(timestamp, id) of the newest settled rating, or NO_RATINGS"""
+    row = db.session.execute(
+        select(Rating.timestamp, Rating.id)
+        .where(Rating.timestamp <= settled_cutoff())
+        .order_by(Rating.timestamp.desc(), Rating.id.desc())
+        .limit(1)
+    ).first()
+    return tuple(row) if row is not None else NO_RATINGS
+
+def genre_masks(genres):
+    """Boolean row mask per lower-cased genre of a '|'-separated genres column.
+
+    Each distinct genre string is split once; rows are matched on their
+    categorical codes.
+    """
+    genres = genres.astype('category')
+    codes = genres.cat.codes.to_numpy()
+    genre_codes = {}
+    for code, value in enumerate(genres.cat.categories):
+        for genre in str(value).split('|'):
+            if genre:
+                genre_codes.setdefault(genre.lower(), []).append(code)
+    return {genre: np.isin(codes, category_codes) for genre, category_codes in genre_codes.items()}
 
 class RecommendationService:
-    def __init__(self):
+    def __init__(self, top_k=None, collab_engine=None):
+        # Neighbors kept per item. 0 keeps the full dense N x N matrices,
+        # None defers to the RECOMMENDER_TOP_K config value.
+        self.top_k = top_k
+        self.collab_engine = collab_engine # None defers to RECOMMENDER_COLLAB_ENGINE
         self.movies_df = None
         self.ratings_df = None
         self.movie_idx = None # Map title -> index (Content)
         self.idx_to_movie = None
+        self.id_index = None # Movie id -> content index
         self.cosine_sim_content = None
         self.cosine_sim_collab = None
-        self.mapper = None # Map title -> index (Collab)
-        self.index_to_title_collab = None
+        self.canonical_mask = None # One content row per distinct title
+        self.genre_masks = None # Lower-cased genre -> boolean row mask
+        self.release_years = None # Year parsed from each title, 0 if none
+        self.title_matcher = None
+        self.genre_matrix = None
+        self.movie_user_matrix = None # Content index x user code (CSR)
+        self.collab_user_ids = None # Column -> user_id
+        self.collab_norms = None # L2 norm of each movie_user_matrix row
+        self.popularity = None # Ratings per movie
+        self.bayesian_ratings = None # Mean rating shrunk toward the global mean
+        self.prior_rank = None # Position of each movie by the two priors (0 = best)
+        self.version = None
+        self.revision = 0 # Incremental updates applied on top of `version`
+        self.rating_mark = None # (timestamp, id) up to which ratings are in the model
         self.initialized = False
 
-    def load_data(self):
+    @timed('load_data')
+    def load_data(self, chunksize=100000):
         """Load data from the Database into Pandas DataFrames"""
-        # Load Movies
-        # using read_sql with db.session.connection()
-        conn = db.session.connection()
+        started = time.perf_counter()
+        # Only the columns the models use, streamed in chunks (server-side
+        # cursor where the driver supports it) and stored at 32-bit width
+        conn = db.session.connection().execution_options(stream_results=True)
+
+        # Taken before the read: ratings past it that the read also saw are
+        # applied again by the incremental updater, which is harmless
+        self.rating_mark = settled_rating_mark()
         
-        self.movies_df = pd.read_sql(text("SELECT * FROM movie"), conn)
-        self.ratings_df = pd.read_sql(text("SELECT * FROM rating"), conn)
+        self.movies_df = pd.read_sql(
+            text("SELECT id, title, genres FROM movie ORDER BY id"), conn, dtype={'id': 'int32'}
+        )
+        rating_chunks = pd.read_sql(
+            text("SELECT user_id, movie_id, rating FROM rating"), conn, chunksize=chunksize,
+            dtype={'user_id': 'int32', 'movie_id': 'int32', 'rating': 'float32'}
+        )
+        self.ratings_df = pd.concat(rating_chunks, ignore_index=True)
         
-        self.movies_df['genres'] = self.movies_df['genres'].fillna('')
+        # Few distinct genre strings, so a categorical stores each once
+        self.movies_df['genres'] = self.movies_df['genres'].fillna('').astype('category')
+        self._index_movies()
+
+        print(
+            f"Loaded {len(self.movies_df)} movies ({frame_mb(self.movies_df):.1f} MB) and "
+            f"{len(self.ratings_df)} ratings ({frame_mb(self.ratings_df):.1f} MB) "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
         
+        self.initialized = True
+
+    def _index_movies(self):
+        """Build the title <-> content index maps from movies_df"""
         # Mapping for Content-Based
         self.movies_df = self.movies_df.reset_index(drop=True)
         # We will use 'title' as the key to match legacy logic, but ID is better in future.
         self.movie_idx = dict(zip(self.movies_df['title'], list(self.movies_df.index)))
         self.idx_to_movie = dict(zip(list(self.movies_df.index), self.movies_df['title']))
-        
-        self.initialized = True
+        self.id_index = pd.Index(self.movies_df['id'])
+        # Duplicate titles collapse onto the row the title map points at
+        self.canonical_mask = np.zeros(len(self.movies_df), dtype=bool)
+        self.canonical_mask[list(self.movie_idx.values())] = True
+        self.title_matcher = TitleMatcher(self.movie_idx.keys(), threshold=60)
+
+        # Filter indexes, built once so a filter is one AND per movie
+        years = self.movies_df['title'].str.extract(TITLE_YEAR, expand=False)
+        self.release_years = pd.to_numeric(years, errors='coerce').fillna(0).to_numpy(np.int16)
+        self.genre_masks = genre_masks(self.movies_df['genres'])
+
+    def _build_options(self):
+        config = current_app.config
+        return {
+            'block_size': config['RECOMMENDER_BLOCK_SIZE'],
+            'workers': config['RECOMMENDER_BUILD_WORKERS'] or os.cpu_count() or 1,
+            'spill_dir': config['RECOMMENDER_SPILL_DIR'],
+        }
+
+    def _build_similarity(self, matrix, top_k):
+        """Dense cosine matrix, or a top-K neighbor index when top_k > 0"""
+        if top_k:
+            return top_k_cosine(matrix, top_k, **self._build_options())
+        return dense_cosine(matrix, **self._build_options())
+
+    def _build_content_similarity(self, matrix):
+        """Cosine between the distinct genre strings, expanded per movie on lookup.
+
+        A catalogue has a few hundred genre strings for thousands of movies,
+        so this is exact and far smaller than N x N, in top-K mode too:
+        cutting it to K neighbors would keep K of hundreds of exact ties.
+        """
+        signatures, _ = pd.factorize(self.movies_df['genres'])
+        return signature_cosine(matrix, signatures, **self._build_options())
+
+    def _build_collab_similarity(self, matrix, top_k):
+        """Collaborative neighbors from the configured engine"""
+        config = current_app.config
+        engine = self.collab_engine or config.get('RECOMMENDER_COLLAB_ENGINE', 'exact')
+        if engine == 'exact':
+            return self._build_similarity(matrix, top_k)
+        if engine == 'lsh':
+            return lsh_top_k_cosine(
+                matrix, top_k or ANN_DEFAULT_K,
+                n_tables=config['RECOMMENDER_ANN_TABLES'], n_bits=config['RECOMMENDER_ANN_BITS'],
+            )
+        if engine == 'svd':
+            # Scored from the factors directly, so top_k does not apply
+            return svd_factors(matrix, config['RECOMMENDER_SVD_RANK'])
+        raise ValueError(f'Unknown collaborative engine {engine!r}')
 
     def train_models(self):
         if not self.initialized:
             self.load_data()
+
+        top_k = self.top_k
+        if top_k is None:
+            top_k = current_app.config.get('RECOMMENDER_TOP_K', 0)
             
         print("Training Content Model...")
-        # Content-Based (Genres)
-        count_vectorizer = CountVectorizer(stop_words='english')
-        genre_matrix = count_vectorizer.fit_transform(self.movies_df['genres'])
-        self.cosine_sim_content = cosine_similarity(genre_matrix, genre_matrix)
+        with timed('train_content'):
+            # Content-Based (Genres)
+            count_vectorizer = CountVectorizer(stop_words='english')
+            self.genre_matrix = count_vectorizer.fit_transform(self.movies_df['genres'])
+            self.cosine_sim_content = self._build_content_similarity(self.genre_matrix)
         
         print("Training Collaborative Model...")
-        # Collaborative (Ratings)
-        # Merge not needed if we have IDs, but let's stick to the pivot on Title for consistency with legacy
-        # or better, pivot on Movie ID? 
-        # The legacy code pivoted on TITLE. Let's try to pivot on Title to keep logic similar.
-        
-        ratings_with_titles = self.ratings_df.merge(self.movies_df[['id', 'title']], left_on='movie_id', right_on='id')
-        user_movie_matrix = ratings_with_titles.pivot_table(index='title', columns='user_id', values='rating').fillna(0)
+        with timed('train_collab'):
+            self._train_collab(top_k)
         
-        movie_user_matrix_sparse = csr_matrix(user_movie_matrix.values)
-        self.cosine_sim_collab = cosine_similarity(movie_user_matrix_sparse)
-        
-        self.mapper = {title: i for i, title in enumerate(user_movie_matrix.index)}
-        self.index_to_title_collab = {i: title for i, title in enumerate(user_movie_matrix.index)}
+        self.version = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+
+    def _train_collab(self, top_k):
+        """Movie x user rating matrix and the collaborative neighbors built from it"""
+        # Rows follow the content index and columns are factorized user ids,
+        # so the sparse matrix is built straight from the rating arrays and
+        # the collab scores line up with the content scores.
+        ratings = self.ratings_df.drop_duplicates(['user_id', 'movie_id'], keep='last')
+        rows = self.id_index.get_indexer(ratings['movie_id'])
+        known = rows >= 0
+        user_codes, user_ids = pd.factorize(ratings['user_id'].to_numpy()[known], sort=True)
+
+        self.movie_user_matrix = csr_matrix(
+            (
+                ratings['rating'].to_numpy(dtype=np.float32)[known],
+                (rows[known].astype(np.int32), user_codes.astype(np.int32)),
+            ),
+            shape=(len(self.movies_df), len(user_ids)),
+        )
+        self.collab_user_ids = np.asarray(user_ids)
+        self.collab_norms = row_norms(self.movie_user_matrix)
+        self._compute_priors()
+        self.cosine_sim_collab = self._build_collab_similarity(self.movie_user_matrix, top_k)
+
+    def _compute_priors(self):
+        """Popularity and Bayesian-average rating of every movie, from movie_user_matrix.
+
+        prior_rank orders movies by Bayesian average, then popularity, then
+        index; it breaks score ties for seeds without ratings, whose
+        genre-only scores tie in large groups.
+        """
+        matrix = self.movie_user_matrix
+        counts = np.diff(matrix.indptr)
+        sums = np.asarray(matrix.sum(axis=1, dtype=np.float64)).ravel()
+        mean = sums.sum() / max(int(counts.sum()), 1)
+
+        self.popularity = counts.astype(np.int32)
+        self.bayesian_ratings = ((sums + PRIOR_RATINGS * mean) / (counts + PRIOR_RATINGS)).astype(np.float32)
+        order = np.lexsort((np.arange(counts.size), -counts, -self.bayesian_ratings))
+        self.prior_rank = np.empty(counts.size, dtype=np.int32)
+        self.prior_rank[order] = np.arange(counts.size, dtype=np.int32)
+
+    def memory_usage(self):
+        """Bytes held by each model component (memory-mapped arrays count their mapped size)"""
+        usage = {}
+        for name, value in (
+            ('content_similarity', self.cosine_sim_content),
+            ('collab_similarity', self.cosine_sim_collab),
+        ):
+            if value is not None:
+                usage[name] = value.nbytes
+        if self.movie_user_matrix is not None:
+            matrix = self.movie_user_matrix
+            usage['movie_user_matrix'] = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        if self.movies_df is not None:
+            usage['movies'] = int(self.movies_df.memory_usage(deep=True).sum())
+        if self.ratings_df is not None:
+            usage['ratings'] = int(self.ratings_df.memory_usage(deep=True).sum())
+        return usage
+
+    @property
+    def model_version(self):
+        """Build version, plus a digest of the rating mark once updates are applied.
+
+        Workers that fold the same ratings into the same build get the same
+        tag, so it can key caches shared between them.
+        """
+        if not self.revision:
+            return self.version
+        timestamp, rating_id = self.rating_mark
+        digest = hashlib.sha1(f'{timestamp.isoformat()}/{rating_id}'.encode()).hexdigest()[:12]
+        return f'{self.version}+{digest}'
+
+    def ensure_ready(self):
+        """Load persisted model artifacts if configured, otherwise train from the database"""
+        if self.cosine_sim_content is not None:
+            return
+
+        artifact_dir = current_app.config.get('RECOMMENDER_ARTIFACT_DIR')
+        if artifact_dir and artifacts.current_version(artifact_dir):
+            with timed('load_artifacts'):
+                artifacts.load_artifacts(self, artifact_dir)
+        else:
+            self.train_models()
 
     def find_closest_title(self, title):
-        """Find the closest matching title using FuzzyWuzzy"""
+        """Find the closest matching title using FuzzyWuzzy over trigram candidates"""
         if not self.initialized:
-            self.train_models()
+            self.ensure_ready()
         
         # If exact match exists, return it
         if title in self.movie_idx:
             return title
             
-        # Otherwise find closest
-        from fuzzywuzzy import process
-        all_titles = list(self.movie_idx.keys())
-        match = process.extractOne(title, all_titles)
-        # match is (string, score)
-        if match and match[1] >= 60: # Threshold
-            return match[0]
-        return None
-
-    def get_recommendations(self, title_input, n_recommendations=10):
+        # Otherwise find closest (trigram candidates + fuzzy re-rank, cached)
+        with timed('fuzzy_match'):
+            return self.title_matcher.match(title)
+
+    def filter_mask(self, genres=None, min_year=None, max_year=None, exclude_ids=None):
+        """Boolean mask of the movies that pass the filters, None if no filter is set.
+
+        A movie passes `genres` if it has any of them (case-insensitive).
+        Year bounds are inclusive and drop titles without a year. Excluded
+        ids also drop their duplicate-title twins. Raises ValueError for an
+        unknown genre.
+        """
         if not self.initialized:
-            self.train_models() # Auto-train on first request if needed
+            self.ensure_ready()
+        if not genres and min_year is None and max_year is None and not exclude_ids:
+            return None
+
+        allowed = np.ones(len(self.movies_df), dtype=bool)
+        if genres:
+            unknown = [genre for genre in genres if genre.lower() not in self.genre_masks]
+            if unknown:
+                raise ValueError(f"Unknown genre: {', '.join(unknown)}")
+            allowed &= np.logical_or.reduce([self.genre_masks[genre.lower()] for genre in genres])
+        if min_year is not None:
+            allowed &= self.release_years >= min_year
+        if max_year is not None:
+            allowed &= (self.release_years <= max_year) & (self.release_years > 0)
+        if exclude_ids:
+            rows = self.id_index.get_indexer(np.asarray(exclude_ids))
+            rows = rows[rows >= 0].tolist()
+            allowed[rows] = False
+            allowed[[self.movie_idx[self.idx_to_movie[row]] for row in rows]] = False
+        return allowed
+
+    def get_recommendations(self, title_input, n_recommendations=10, alpha=0.5, allowed=None):
+        if not self.initialized:
+            self.ensure_ready() # Auto-load or train on first request if needed
             
         title = self.find_closest_title(title_input)
         
@@ -90,40 +348,149 @@ class RecommendationService:
             # If still nothing
             return [] 
 
-        # --- Content-Based ---
-        content_scores = {}
         idx = self.movie_idx[title]
-        sim_scores = list(enumerate(self.cosine_sim_content[idx]))
-        for i, score in sim_scores:
-            curr_title = self.idx_to_movie[i]
-            content_scores[curr_title] = score
-            
+        final_scores = self._recommend_rows([idx], n_recommendations, alpha, allowed)[0]
+        return {'matched_title': title, 'recommendations': final_scores}
+
+    def resolve_seeds(self, seeds):
+        """Content index for each seed title (str) or movie id (int), None if unmatched"""
+        if not self.initialized:
+            self.ensure_ready()
+
+        ids = [seed for seed in seeds if not isinstance(seed, str)]
+        id_rows = iter(self.id_index.get_indexer(ids).tolist() if ids else [])
+
+        resolved = []
+        for seed in seeds:
+            if isinstance(seed, str):
+                title = self.find_closest_title(seed)
+            else:
+                row = next(id_rows)
+                title = self.idx_to_movie[row] if row >= 0 else None
+            # Duplicate titles resolve to the same canonical row
+            resolved.append(self.movie_idx[title] if title else None)
+        return resolved
+
+    def get_batch_recommendations(self, seeds, n_recommendations=10, alpha=0.5, allowed=None):
+        """Recommendations for many seed titles / movie ids in one scoring pass.
+
+        `allowed` is an optional filter_mask applied to every seed.
+        """
+        resolved = self.resolve_seeds(seeds)
+        matched = sorted({idx for idx in resolved if idx is not None})
+
+        # Score the seeds a few rows at a time so each score block stays
+        # cache sized; one huge block is slower than many single rows.
+        step = max(1, BATCH_BLOCK_ITEMS // len(self.movies_df))
+        by_idx = {}
+        for start in range(0, len(matched), step):
+            block = matched[start:start + step]
+            by_idx.update(zip(block, self._recommend_rows(block, n_recommendations, alpha, allowed)))
+
+        results = []
+        for seed, idx in zip(seeds, resolved):
+            if idx is None:
+                results.append({'input': seed, 'error': 'Movie not found'})
+            else:
+                results.append({
+                    'input': seed,
+                    'matched_movie': self.idx_to_movie[idx],
+                    'recommendations': by_idx[idx],
+                })
+        return results
+
+    def get_user_recommendations(self, movie_ids, ratings, n_recommendations=10, alpha=0.5, allowed=None):
+        """Recommendations for a user from the movies they rated.
+
+        Every item is scored by one weighted sum of the similarity rows of
+        the rated movies (the user's sparse rating vector times the item-item
+        matrix). Weights are the ratings centred on the user's mean, so
+        movies similar to what they disliked are pushed down; a user whose
+        ratings are all equal weights every rated movie the same. Rated
+        movies, and any outside the optional `allowed` mask, are masked out.
+        """
+        if not self.initialized:
+            self.ensure_ready()
+
+        rows = self.id_index.get_indexer(np.asarray(movie_ids))
+        known = rows >= 0
+        rows = rows[known]
+        if not rows.size:
+            return []
+
+        weights = np.asarray(ratings, dtype=np.float64)[known]
+        weights = weights - weights.mean()
+        if not np.any(weights):
+            weights = np.ones_like(weights)
+        weights /= np.abs(weights).sum()
+
+        with timed('content_scoring'):
+            content_scores = self.cosine_sim_content.combine(rows, weights)
+        with timed('collab_scoring'):
+            rated = self.collab_norms[rows] > 0 # Movies without ratings are content-only
+            collab_scores = self.cosine_sim_collab.combine(rows[rated], weights[rated])
+        with timed('fusion'):
+            scores = hybrid_scores(content_scores, collab_scores, alpha)
+
+        with timed('ranking'):
+            valid = self.canonical_mask.copy()
+            valid[rows] = False
+            valid[[self.movie_idx[self.idx_to_movie[row]] for row in rows.tolist()]] = False
+            if allowed is not None:
+                valid &= allowed
+
+            # Nothing rated has ratings of its own: content ties go to the priors
+            tiebreak = None if rated.any() else self.prior_rank
+            return [
+                {'title': self.idx_to_movie[i], 'score': float(scores[i])}
+                for i in top_n(scores, n_recommendations, valid, tiebreak).tolist()
+            ]
+
+    def _rank_rows(self, rows, n_recommendations, alpha, allowed=None):
+        """(indices, scores) of the top recommendations for each content row in `rows`.
+
+        `allowed` is an optional boolean mask over all movies (see filter_mask).
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+
+        # --- Content-Based ---
+        with timed('content_scoring'):
+            content_block = self.cosine_sim_content.rows(rows)
+
         # --- Collaborative ---
-        collab_scores = {}
-        if title in self.mapper:
-            idx = self.mapper[title]
-            sim_scores = list(enumerate(self.cosine_sim_collab[idx]))
-            for i, score in sim_scores:
-                curr_title = self.index_to_title_collab[i]
-                collab_scores[curr_title] = score
-                
+        with timed('collab_scoring'):
+            collab_block = self.cosine_sim_collab.rows(rows)
+            collab_block[self.collab_norms[rows] == 0] = 0 # Movies without ratings are content-only
+
         # --- Hybrid ---
-        all_movies = set(content_scores.keys()) | set(collab_scores.keys())
-        if title in all_movies:
-            all_movies.remove(title)
-            
-        final_scores = []
-        for mv in all_movies:
-            s_content = content_scores.get(mv, 0.0)
-            s_collab = collab_scores.get(mv, 0.0)
-            
-            # 50/50 Weight
-            hybrid_score = (s_content * 0.5) + (s_collab * 0.5)
-            # Store also the matched title to tell the user what we used
-            final_scores.append({'title': mv, 'score': hybrid_score})
-            
-        final_scores = sorted(final_scores, key=lambda x: x['score'], reverse=True)
-        return {'matched_title': title, 'recommendations': final_scores[:n_recommendations]}
+        # alpha * content + (1 - alpha) * collab over every movie at once
+        with timed('fusion'):
+            scores = hybrid_scores(content_block, collab_block, alpha)
+
+        with timed('ranking'):
+            valid = np.repeat(self.canonical_mask[None, :], len(rows), axis=0)
+            valid[np.arange(len(rows)), rows] = False
+            if allowed is not None:
+                valid &= allowed
+
+            # Seeds without ratings score on genres alone, which tie in large
+            # groups; those ties go to the popularity priors instead of the index
+            cold = self.collab_norms[rows] == 0
+            if cold.all() or not cold.any():
+                tiebreak = self.prior_rank if cold.all() else None
+                best_rows = top_n_rows(scores, n_recommendations, valid, tiebreak)
+            else:
+                best_rows = [None] * len(rows)
+                for group, tiebreak in ((~cold, None), (cold, self.prior_rank)):
+                    positions = np.flatnonzero(group)
+                    ranked = top_n_rows(scores[positions], n_recommendations, valid[positions], tiebreak)
+                    for r, best in zip(positions.tolist(), ranked):
+                        best_rows[r] = best
+            return [(best, scores[r, best]) for r, best in enumerate(best_rows)]
 
-# Singleton Instance
-recommender_service = RecommendationService()
+    def _recommend_rows(self, rows, n_recommendations, alpha, allowed=None):
+        """Top recommendations for each content row in `rows`"""
+        return [
+            [{'title': self.idx_to_movie[i], 'score': score} for i, score in zip(best.tolist(), scores.tolist())]
+            for best, scores in self._rank_rows(rows, n_recommendations, alpha, allowed)
+        ]
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def hybrid_scores(content_row, collab_row=None, alpha=0.5):
+    """Blend aligned content and collab rows: alpha * content + (1 - alpha) * collab"""
+    scores = np.multiply(content_row, alpha, dtype=np.float64)
+    if collab_row is not None:
+        scores += (1 - alpha) * np.asarray(collab_row, dtype=np.float64)
+    return scores
+
+
+def top_n(scores, n, valid=None, tiebreak=None):
+    """Indices of the `n` highest scores, best first.
+
+    `valid` is an optional boolean mask of eligible items. Ties are broken
+    by the lower `tiebreak` key of each item, or by the lower index when
+    there is none, so results are deterministic.
+    """
+    return top_n_rows(scores[None, :], n, None if valid is None else valid[None, :], tiebreak)[0]
+
+
+def top_n_rows(scores, n, valid=None, tiebreak=None):
+    """`top_n` for every row of a 2-D score block with one partition.
+
+    Returns one index array per row; entries masked out by `valid` are
+    dropped, so rows can come back shorter than `n`.
+    """
+    if valid is not None:
+        scores = np.where(valid, scores, -np.inf)
+
+    n_rows, n_items = scores.shape
+    n = min(n, n_items)
+    if n <= 0:
+        return [np.empty(0, dtype=np.intp) for _ in range(n_rows)]
+
+    finite = np.isfinite(scores)
+    if n < n_items:
+        # Everything at or above the n-th best score, so items tied with it
+        # are all candidates and the tie-break below sees every one of them
+        kth = -np.partition(-scores, n - 1, axis=1)[:, n - 1:n]
+        finite &= scores >= kth
+    rows, candidates = np.nonzero(finite)
+
+    # lexsort sorts by the last key first: row, score descending, then the
+    # tie-break key
+    keys = candidates if tiebreak is None else tiebreak[candidates]
+    order = np.lexsort((keys, -scores[rows, candidates], rows))
+    rows, candidates = rows[order], candidates[order]
+    starts = np.searchsorted(rows, np.arange(n_rows))
+    stops = np.minimum(np.searchsorted(rows, np.arange(n_rows), side='right'), starts + n)
+    return [candidates[start:stop] for start, stop in zip(starts, stops)]
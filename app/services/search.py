@@ -0,0 +1,55 @@
+import re
+from sqlalchemy import func, select, text
+from app.extensions import db
+from app.models import Movie
+
+# Engine URL -> whether the movie_fts table exists (checked once per process)
+_fts_available = {}
+
+def has_fts_index():
+    """True if the SQLite FTS5 title index from the search migration is present"""
+    bind = db.session.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return False
+
+    key = str(bind.url)
+    if key not in _fts_available:
+        row = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movie_fts'")
+        ).first()
+        _fts_available[key] = row is not None
+    return _fts_available[key]
+
+def fts_query(query):
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    tokens = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def search_titles(query, limit=20):
+    """Movies whose title matches `query`, best match first, as (id, title, genres) tuples.
+
+    SQLite uses the movie_fts index ranked by bm25, Postgres uses the
+    pg_trgm index ranked by trigram similarity, anything else falls back
+    to an unranked ILIKE scan.
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if has_fts_index():
+        match = fts_query(query)
+        if not match:
+            return []
+        rows = db.session.execute(
+            text(
+                "SELECT movie.id, movie.title, movie.genres FROM movie_fts "
+                "JOIN movie ON movie.id = movie_fts.rowid "
+                "WHERE movie_fts MATCH :match ORDER BY movie_fts.rank, movie.id LIMIT :limit"
+            ),
+            {'match': match, 'limit': limit},
+        )
+    else:
+        stmt = select(Movie.id, Movie.title, Movie.genres).where(Movie.title.ilike(f'%{query}%'))
+        if dialect == 'postgresql':
+            stmt = stmt.order_by(func.similarity(Movie.title, query).desc(), Movie.id)
+        rows = db.session.execute(stmt.limit(limit))
+
+    return [tuple(row) for row in rows]
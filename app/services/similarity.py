@@ -0,0 +1,368 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.sparse.linalg import svds
+from sklearn.preprocessing import normalize
+from sklearn.utils.extmath import safe_sparse_dot
+
+
+def row_norms(matrix):
+    """L2 norm of every row of a sparse matrix"""
+    return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+
+
+class DenseSimilarity:
+    """Full N x N similarity matrix (the original storage format)."""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    @property
+    def nbytes(self):
+        return self.matrix.nbytes
+
+    def rows(self, idx):
+        """Rows `idx` as a dense (len(idx), N) block"""
+        return np.asarray(self.matrix[np.asarray(idx)])
+
+    def combine(self, idx, weights):
+        """Weighted sum of rows `idx`: weights @ matrix[idx]"""
+        return np.asarray(weights, dtype=np.float64) @ self.rows(idx)
+
+    def to_arrays(self):
+        return {'matrix': self.matrix}, {'kind': 'dense'}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays['matrix'])
+
+
+class TopKNeighbors:
+    """Top-K neighbors per item, stored as int32 indices plus float32 scores.
+
+    Row i holds the K most similar items to item i ordered by descending
+    score. Everything outside the top-K is treated as a similarity of 0.
+    Memory is N*K*8 bytes instead of N*N*8.
+    """
+
+    def __init__(self, indices, scores, n_items):
+        self.indices = indices
+        self.scores = scores
+        self._n_items = n_items
+
+    @property
+    def k(self):
+        return self.indices.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes + self.scores.nbytes
+
+    def rows(self, idx):
+        """Expand rows `idx` into a dense (len(idx), N) float32 block"""
+        idx = np.asarray(idx)
+        out = np.zeros((len(idx), self._n_items), dtype=np.float32)
+        out[np.arange(len(idx))[:, None], self.indices[idx]] = self.scores[idx]
+        return out
+
+    def combine(self, idx, weights):
+        """Weighted sum of rows `idx`, scattered straight from the neighbor lists"""
+        idx = np.asarray(idx)
+        contributions = self.scores[idx] * np.asarray(weights, dtype=np.float64)[:, None]
+        return np.bincount(self.indices[idx].ravel(), weights=contributions.ravel(), minlength=self._n_items)
+
+    def updated(self, items, item_scores):
+        """Copy of the index with the rows and columns of `items` refreshed.
+
+        `item_scores` is a dense (len(items), n_items) block holding the new
+        similarities of each updated item to every item. Rows of `items` are
+        rebuilt from it. In every other row, existing entries that point at
+        an updated item get the new score, and an updated item that now
+        beats the row's weakest neighbor is inserted. An entry that drops
+        out of a row's true top-K is only replaced at the next full build.
+        """
+        items = np.asarray(items, dtype=np.int64)
+        n_items = self._n_items
+        k = self.k
+
+        indices = np.array(self.indices, dtype=np.int32)
+        scores = np.array(self.scores, dtype=np.float32)
+
+        position = np.full(n_items, -1, dtype=np.int64)
+        position[items] = np.arange(len(items))
+        others = np.ones(n_items, dtype=bool)
+        others[items] = False
+
+        # Refresh existing entries that point at an updated item
+        rows, slots = np.nonzero((position[indices] >= 0) & others[:, None])
+        scores[rows, slots] = item_scores[position[indices[rows, slots]], rows]
+
+        # Insert updated items that beat a row's weakest neighbor
+        other_rows = np.flatnonzero(others)
+        challengers = item_scores[:, other_rows].T
+        already = np.zeros_like(challengers, dtype=bool)
+        present_rows, present_slots = np.nonzero(position[indices[other_rows]] >= 0)
+        already[present_rows, position[indices[other_rows][present_rows, present_slots]]] = True
+        better = (challengers > scores[other_rows].min(axis=1)[:, None]) & ~already
+        touched = np.flatnonzero(better.any(axis=1))
+        if touched.size:
+            row_ids = other_rows[touched]
+            merged_idx = np.concatenate(
+                [indices[row_ids], np.broadcast_to(items.astype(np.int32), (touched.size, len(items)))], axis=1
+            )
+            merged_scores = np.concatenate(
+                [scores[row_ids], np.where(better[touched], challengers[touched], -np.inf)], axis=1
+            )
+            top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+            indices[row_ids] = np.take_along_axis(merged_idx, top, axis=1)
+            scores[row_ids] = np.take_along_axis(merged_scores, top, axis=1)
+
+        # Rebuild the updated rows from scratch
+        top = np.argpartition(-item_scores, k - 1, axis=1)[:, :k]
+        indices[items] = top
+        scores[items] = np.take_along_axis(item_scores, top, axis=1)
+
+        # Keep every touched row ordered by descending score
+        dirty = np.unique(np.concatenate([rows, other_rows[touched], items]))
+        order = np.argsort(-scores[dirty], axis=1, kind='stable')
+        indices[dirty] = np.take_along_axis(indices[dirty], order, axis=1)
+        scores[dirty] = np.take_along_axis(scores[dirty], order, axis=1)
+
+        return TopKNeighbors(indices, scores, n_items)
+
+    def to_arrays(self):
+        return (
+            {'indices': self.indices, 'scores': self.scores},
+            {'kind': 'topk', 'n_items': self._n_items},
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays['indices'], arrays['scores'], meta['n_items'])
+
+
+class FactorSimilarity:
+    """Cosine similarity between rank-k latent item factors.
+
+    Only the L2-normalized (N x k) float32 factor matrix is stored; a row of
+    similarities is one (N x k) @ (k,) product computed on demand.
+    """
+
+    def __init__(self, factors):
+        self.factors = factors
+
+    @property
+    def nbytes(self):
+        return self.factors.nbytes
+
+    def rows(self, idx):
+        """Rows `idx` as a dense (len(idx), N) block"""
+        return self.factors[np.asarray(idx)] @ self.factors.T
+
+    def combine(self, idx, weights):
+        """Weighted sum of rows `idx`, folded into one latent vector first"""
+        folded = np.asarray(weights, dtype=np.float32) @ self.factors[np.asarray(idx)]
+        return self.factors @ folded
+
+    def to_arrays(self):
+        return {'factors': self.factors}, {'kind': 'factors'}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays['factors'])
+
+
+class SignatureSimilarity:
+    """Similarity between items that share few distinct feature rows.
+
+    Items with the same signature (e.g. the same genres string) have
+    identical similarity rows, so only the (S x S) matrix between distinct
+    signatures is stored, plus each item's signature id. A row is expanded
+    to all N items with one gather. Memory is S*S*4 + N*4 bytes.
+    """
+
+    def __init__(self, matrix, signatures):
+        self.matrix = matrix
+        self.signatures = signatures
+        # Gathers with native-width indices skip an index conversion per call
+        self._lookup = np.asarray(signatures, dtype=np.intp)
+
+    @property
+    def nbytes(self):
+        return self.matrix.nbytes + self.signatures.nbytes
+
+    def rows(self, idx):
+        """Rows `idx` as a dense (len(idx), N) block"""
+        return np.take(self.matrix[self._lookup[np.asarray(idx)]], self._lookup, axis=1)
+
+    def combine(self, idx, weights):
+        """Weighted sum of rows `idx`, folded per signature before expanding"""
+        folded = np.bincount(
+            self._lookup[np.asarray(idx)], weights=np.asarray(weights, dtype=np.float64),
+            minlength=self.matrix.shape[0],
+        )
+        return np.take(folded @ self.matrix, self._lookup)
+
+    def to_arrays(self):
+        return {'matrix': self.matrix, 'signatures': self.signatures}, {'kind': 'signature'}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays['matrix'], arrays['signatures'])
+
+
+SIMILARITY_KINDS = {
+    'dense': DenseSimilarity,
+    'topk': TopKNeighbors,
+    'factors': FactorSimilarity,
+    'signature': SignatureSimilarity,
+}
+
+
+def svd_factors(matrix, rank, seed=0):
+    """FactorSimilarity from a rank-`rank` truncated SVD of a sparse (items x users) matrix.
+
+    Item factors are the left singular vectors scaled by the singular
+    values, so their dot products approximate the item-item products of the
+    input. Cost grows with the number of nonzeros, not with N^2.
+    """
+    rank = max(1, min(rank, min(matrix.shape) - 1))
+    u, s, _ = svds(matrix.astype(np.float64), k=rank, random_state=seed)
+    factors = np.ascontiguousarray(normalize(u * s, norm='l2', axis=1), dtype=np.float32)
+    return FactorSimilarity(factors)
+
+
+class _BlockOutput:
+    """An (N x M) build result filled one row block at a time.
+
+    Without `spill_dir` it is a plain array. With it, blocks are written
+    straight into an .npy file there with pwrite rather than through a
+    writable mapping, so they leave the process as soon as they are
+    computed; the finished file is mapped read-only and unlinked, and it
+    disappears with the last reference to the array.
+    """
+
+    def __init__(self, shape, dtype, spill_dir=None):
+        self.dtype = np.dtype(dtype)
+        self._array = None
+        self._fd = None
+        if not spill_dir:
+            self._array = np.empty(shape, dtype=self.dtype)
+            return
+
+        os.makedirs(spill_dir, exist_ok=True)
+        fd, self._path = tempfile.mkstemp(prefix='similarity-', suffix='.npy', dir=spill_dir)
+        os.close(fd)
+        self._row_bytes = self.dtype.itemsize * int(np.prod(shape[1:]))
+        # .npy header, then a sparse file of the full size
+        with open(self._path, 'wb') as f:
+            header = {'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False, 'shape': shape}
+            np.lib.format.write_array_header_1_0(f, header)
+            self._offset = f.tell()
+            f.truncate(self._offset + shape[0] * self._row_bytes)
+        self._fd = os.open(self._path, os.O_WRONLY)
+
+    def write(self, start, block):
+        if self._fd is None:
+            self._array[start:start + len(block)] = block
+            return
+        data = np.ascontiguousarray(block, dtype=self.dtype).tobytes()
+        os.pwrite(self._fd, data, self._offset + start * self._row_bytes)
+
+    def result(self):
+        if self._fd is None:
+            return self._array
+        os.close(self._fd)
+        array = np.load(self._path, mmap_mode='r')
+        os.unlink(self._path)
+        return array
+
+
+def run_blocks(fill_block, n_items, block_size, workers):
+    """Call fill_block(start, stop) for every row block, on `workers` threads.
+
+    The sparse products and the partition/sort calls release the GIL, so
+    threads share the normalized matrix without copying it. Only `workers`
+    blocks are in flight at a time.
+    """
+    blocks = [(start, min(start + block_size, n_items)) for start in range(0, n_items, block_size)]
+    if workers <= 1 or len(blocks) <= 1:
+        for start, stop in blocks:
+            fill_block(start, stop)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(fill_block, start, stop) for start, stop in blocks]:
+            future.result()
+
+
+def _normalized(matrix, dtype):
+    normed = normalize(matrix, norm='l2', axis=1).astype(dtype)
+    # Transpose once so every block product reuses it
+    return normed, normed.T.tocsr()
+
+
+def dense_cosine(matrix, block_size=1024, workers=1, spill_dir=None):
+    """Full cosine matrix of the rows of `matrix`, filled one row block at a time.
+
+    Matches `sklearn.metrics.pairwise.cosine_similarity` but never holds
+    more than `workers` (block_size x N) products besides the result, which
+    can live on disk under `spill_dir`.
+    """
+    # float32 input stays float32, as in sklearn
+    dtype = np.float32 if matrix.dtype == np.float32 else np.float64
+    normed, normed_t = _normalized(matrix, dtype)
+    n_items = normed.shape[0]
+    out = _BlockOutput((n_items, n_items), dtype, spill_dir)
+
+    def fill_block(start, stop):
+        out.write(start, safe_sparse_dot(normed[start:stop], normed_t, dense_output=True))
+
+    run_blocks(fill_block, n_items, block_size, workers)
+    return DenseSimilarity(out.result())
+
+
+def top_k_cosine(matrix, k, block_size=1024, workers=1, spill_dir=None):
+    """Cosine top-K neighbors of every row of `matrix`, computed in row blocks.
+
+    Only `workers` (block_size x N) slices of the similarity matrix exist
+    at any time, so peak memory is bounded by the block size rather than
+    N^2. With `spill_dir` the (N x K) result is memory-mapped from disk too.
+    """
+    normed, normed_t = _normalized(matrix, np.float32)
+    n_items = normed.shape[0]
+    k = min(k, n_items)
+
+    indices = _BlockOutput((n_items, k), np.int32, spill_dir)
+    scores = _BlockOutput((n_items, k), np.float32, spill_dir)
+
+    def fill_block(start, stop):
+        # Sparse x sparse straight into a dense block, no sparse intermediate
+        block = safe_sparse_dot(normed[start:stop], normed_t, dense_output=True)
+
+        # argpartition picks the K largest per row, then sort just those K
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+
+        indices.write(start, np.take_along_axis(top, order, axis=1))
+        scores.write(start, np.take_along_axis(top_scores, order, axis=1))
+
+    run_blocks(fill_block, n_items, block_size, workers)
+    return TopKNeighbors(indices.result(), scores.result(), n_items)
+
+
+def signature_cosine(matrix, signatures, block_size=1024, workers=1, spill_dir=None):
+    """Cosine between the distinct rows of `matrix`, as a SignatureSimilarity.
+
+    `signatures` gives each row's signature id (0..S-1); rows with the same
+    id must be identical. Build time and memory follow S rather than N.
+    """
+    signatures = np.asarray(signatures, dtype=np.int32)
+    _, first = np.unique(signatures, return_index=True)
+    # float32 scores: half the size, and identical rows still tie exactly
+    distinct = matrix[first].astype(np.float32)
+    unique = dense_cosine(distinct, block_size=block_size, workers=workers, spill_dir=spill_dir)
+    return SignatureSimilarity(unique.matrix, signatures)
+
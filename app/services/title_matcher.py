@@ -0,0 +1,70 @@
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+from fuzzywuzzy import process
+from fuzzywuzzy.utils import full_process
+
+
+def _trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleMatcher:
+    """Fuzzy title lookup backed by a character-trigram inverted index.
+
+    The index narrows the catalog to the `n_candidates` titles sharing the
+    most trigrams with the query, and only those are re-ranked with
+    fuzzywuzzy's WRatio, the scorer `process.extractOne` uses. WRatio gives
+    the same partial token-set score to every title sharing a whole word
+    with the query and extractOne keeps the first such title, so the first
+    `n_token_candidates` titles containing each query word are added too.
+    Results for repeated queries come from a bounded LRU cache.
+    """
+
+    def __init__(self, titles, threshold=60, n_candidates=200, n_token_candidates=8, cache_size=4096):
+        self.titles = list(titles)
+        self.threshold = threshold
+        self.n_candidates = n_candidates
+
+        postings = defaultdict(list)
+        token_postings = defaultdict(list)
+        for i, title in enumerate(self.titles):
+            processed = full_process(title)
+            for gram in _trigrams(processed):
+                postings[gram].append(i)
+            for token in set(processed.split()):
+                if len(token_postings[token]) < n_token_candidates:
+                    token_postings[token].append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._token_postings = {token: np.array(ids, dtype=np.int32) for token, ids in token_postings.items()}
+
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def candidates(self, query):
+        """Indices of the candidate titles for `query`, in catalog order"""
+        processed = full_process(query)
+        lists = [self._postings[gram] for gram in _trigrams(processed) if gram in self._postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+
+        counts = np.bincount(np.concatenate(lists), minlength=len(self.titles))
+        hits = np.flatnonzero(counts)
+        if hits.size > self.n_candidates:
+            hits = hits[np.argpartition(-counts[hits], self.n_candidates - 1)[:self.n_candidates]]
+
+        tokens = [self._token_postings[token] for token in set(processed.split()) if token in self._token_postings]
+        # Catalog order keeps extractOne's first-best tie-breaking
+        return np.unique(np.concatenate([hits] + tokens))
+
+    def _match(self, query):
+        candidates = self.candidates(query)
+        if not candidates.size:
+            return None
+
+        match = process.extractOne(query, [self.titles[i] for i in candidates.tolist()])
+        # match is (string, score)
+        if match and match[1] >= self.threshold:
+            return match[0]
+        return None
@@ -0,0 +1,57 @@
+"""Compare a benchmark report against a saved baseline.
+
+    python -m benchmarks.compare report.json baseline.json --tolerance 0.25
+
+Exits with status 1 when any case regressed.
+"""
+import argparse
+import json
+import sys
+
+# Differences below this many milliseconds are treated as noise
+MIN_DELTA_MS = 0.05
+
+
+def compare(report, baseline, tolerance=0.25):
+    """Rows of (case, baseline, current, ratio, regressed) for cases present in both.
+
+    Cases are gated on p50 latency; tail percentiles of a few hundred
+    samples move too much between runs to fail a build on.
+    """
+    rows = []
+    for name, current in report['cases'].items():
+        previous = baseline['cases'].get(name)
+        if previous is None:
+            continue
+        before, after = previous['p50_ms'], current['p50_ms']
+        ratio = after / before if before else float('inf')
+        regressed = ratio > 1 + tolerance and after - before > MIN_DELTA_MS
+        rows.append((name, previous, current, ratio, regressed))
+    return rows
+
+
+def print_comparison(rows):
+    print(f"{'case':<24} {'base p50':>10} {'p50':>10} {'ratio':>7} {'base p95':>10} {'p95':>10}")
+    for name, previous, current, ratio, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(
+            f"{name:<24} {previous['p50_ms']:>10.3f} {current['p50_ms']:>10.3f} {ratio:>7.2f} "
+            f"{previous['p95_ms']:>10.3f} {current['p95_ms']:>10.3f}{flag}"
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare a benchmark report with a baseline report.')
+    parser.add_argument('report', help='Report written by benchmarks.run')
+    parser.add_argument('baseline', help='Baseline report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before a case counts as regressed')
+    args = parser.parse_args()
+
+    with open(args.report) as f:
+        report = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    rows = compare(report, baseline, args.tolerance)
+    print_comparison(rows)
+    sys.exit(1 if any(row[-1] for row in rows) else 0)
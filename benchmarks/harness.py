@@ -0,0 +1,47 @@
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in megabytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def summarize(latencies, wall):
+    """Report entry for one case: wall time, latency percentiles and peak RSS"""
+    latencies = np.asarray(latencies, dtype=np.float64) * 1000
+    return {
+        'n': int(latencies.size),
+        'wall_s': round(wall, 4),
+        'mean_ms': round(float(latencies.mean()), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 4),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 4),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def measure(fn, inputs):
+    """Call fn(x) for every x in `inputs`, timing each call"""
+    latencies = []
+    started = time.perf_counter()
+    for x in inputs:
+        call_started = time.perf_counter()
+        fn(x)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'numpy': np.__version__,
+    }
@@ -0,0 +1,186 @@
+"""In-process benchmarks for the training and query hot paths.
+
+    python -m benchmarks.run --out report.json
+    python -m benchmarks.run --baseline report.json
+
+Seeds a temporary SQLite database from movies.csv / ratings.csv through the
+migrations and scripts/seed.py, then times each case with the Flask test
+client or the service directly. No server or network is involved. Query
+inputs come from a seeded RNG, so two runs on the same data time the same
+work. The JSON report records wall time, p50/p95/p99 latency and the
+process peak RSS after each case.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from flask_migrate import upgrade
+
+from app import create_app
+from app.config import Config
+from app.services.model_manager import model_manager
+from app.services.recommender import RecommendationService
+from scripts.seed import seed_data
+
+from .compare import compare, print_comparison
+from .harness import environment, measure, summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bench_config(workdir):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        RECOMMENDER_ARTIFACT_DIR = os.path.join(workdir, 'artifacts')
+        RECOMMENDER_RELOAD_INTERVAL = 0
+        RECOMMENDER_CACHE_BACKEND = 'none'
+    return BenchConfig
+
+
+def typo(title, rng):
+    """Lower-cased title with one character dropped"""
+    title = title.lower()
+    cut = int(rng.integers(len(title)))
+    return title[:cut] + title[cut + 1:]
+
+
+def title_queries(titles, n, rng):
+    """Exact titles, one-typo titles and leading-word prefixes, in equal parts"""
+    picks = rng.choice(titles, size=n, replace=True).tolist()
+    third = n // 3
+    exact = picks[:third]
+    typos = [typo(title, rng) for title in picks[third:2 * third]]
+    prefixes = [' '.join(title.split()[:2]) for title in picks[2 * third:]]
+    return exact + typos + prefixes
+
+
+def search_queries(titles, n, rng):
+    """Single words of 3+ letters taken from real titles"""
+    words = [word for title in rng.choice(titles, size=n * 2).tolist() for word in title.split() if word.isalpha() and len(word) >= 3]
+    return words[:n]
+
+
+def run(movies_path, ratings_path, n_queries, repeat, seed):
+    rng = np.random.default_rng(seed)
+    workdir = tempfile.mkdtemp(prefix='recommender-bench-')
+    cases = {}
+    try:
+        app = create_app(bench_config(workdir))
+        client = app.test_client()
+
+        with app.app_context():
+            upgrade(directory=os.path.join(ROOT, 'migrations'))
+
+        started = time.perf_counter()
+        seed_data(movies_path, ratings_path, app=app)
+        elapsed = time.perf_counter() - started
+        cases['seed'] = summarize([elapsed], elapsed)
+
+        with app.app_context():
+            print('Benchmarking load_data...')
+            cases['load_data'] = measure(lambda _: RecommendationService().load_data(), range(repeat))
+
+            print('Benchmarking train_models...')
+            train_times = []
+            for _ in range(repeat):
+                # Loading is timed above; only training is timed here
+                service = RecommendationService()
+                service.load_data()
+                started = time.perf_counter()
+                service.train_models()
+                train_times.append(time.perf_counter() - started)
+            cases['train_models'] = summarize(train_times, sum(train_times))
+
+            titles = service.movies_df['title'].tolist()
+
+            print('Benchmarking find_closest_title...')
+            service.title_matcher.match.cache_clear()
+            cases['find_closest_title'] = measure(service.find_closest_title, title_queries(titles, n_queries, rng))
+
+            print('Benchmarking get_recommendations...')
+            picks = rng.choice(titles, size=n_queries).tolist()
+            cases['get_recommendations'] = measure(service.get_recommendations, picks)
+
+        # Route cases use the trained snapshot instead of a background build
+        model_manager.publish(service, expected=model_manager.get())
+
+        print('Benchmarking /api/movies/search...')
+        cases['search'] = measure(
+            lambda q: client.get('/api/movies/search', query_string={'q': q}),
+            search_queries(titles, n_queries, rng),
+        )
+
+        print('Benchmarking /api/recommend/hybrid...')
+        cases['hybrid_route'] = measure(
+            lambda title: client.get('/api/recommend/hybrid', query_string={'title': title}),
+            rng.choice(titles, size=n_queries).tolist(),
+        )
+
+        print('Benchmarking pagination...')
+        cursors = ['']
+        def keyset_page(i):
+            response = client.get('/api/movies', query_string={'after': cursors[i], 'limit': 100}).get_json()
+            cursors.append(response['next_cursor'] or '')
+        n_pages = -(-len(titles) // 100)
+        cases['paginate_keyset'] = measure(keyset_page, range(n_pages))
+
+        pages = rng.integers(1, n_pages * 5, size=n_queries).tolist()
+        cases['paginate_offset'] = measure(
+            lambda page: client.get('/api/movies', query_string={'page': page, 'per_page': 20}),
+            pages,
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'environment': environment(),
+        'dataset': {'movies': os.path.abspath(movies_path), 'ratings': os.path.abspath(ratings_path)},
+        'settings': {'queries': n_queries, 'repeat': repeat, 'seed': seed},
+        'cases': cases,
+    }
+
+
+def print_report(report):
+    print(f"{'case':<24} {'n':>5} {'wall s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak MB':>8}")
+    for name, case in report['cases'].items():
+        print(
+            f"{name:<24} {case['n']:>5} {case['wall_s']:>8.2f} {case['p50_ms']:>9.3f} "
+            f"{case['p95_ms']:>9.3f} {case['p99_ms']:>9.3f} {case['peak_rss_mb']:>8.1f}"
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the recommender training and query paths in-process.')
+    parser.add_argument('--movies', default=os.path.join(ROOT, 'movies.csv'), help='Path to a movies.csv file')
+    parser.add_argument('--ratings', default=os.path.join(ROOT, 'ratings.csv'), help='Path to a ratings.csv file')
+    parser.add_argument('--queries', type=int, default=500, help='Timed calls per query case')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs of load_data and train_models')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the generated query inputs')
+    parser.add_argument('--out', default=None, help='Write the JSON report here')
+    parser.add_argument('--baseline', default=None, help='Compare against this saved report; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before a case counts as regressed')
+    args = parser.parse_args()
+
+    report = run(args.movies, args.ratings, args.queries, args.repeat, args.seed)
+    print()
+    print_report(report)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance)
+        print()
+        print_comparison(rows)
+        if any(row[-1] for row in rows):
+            raise SystemExit(1)
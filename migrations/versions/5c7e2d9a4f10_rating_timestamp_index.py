@@ -0,0 +1,27 @@
+"""Rating timestamp index
+
+Revision ID: 5c7e2d9a4f10
+Revises: 9a3f6c1e2b74
+Create Date: 2026-10-18 18:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c7e2d9a4f10'
+down_revision = '9a3f6c1e2b74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Workers read new and changed ratings past a (timestamp, id) mark
+    with op.batch_alter_table('rating', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_rating_timestamp'), ['timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('rating', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_rating_timestamp'))
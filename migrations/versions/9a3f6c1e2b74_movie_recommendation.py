@@ -0,0 +1,34 @@
+"""Materialized movie recommendations
+
+Revision ID: 9a3f6c1e2b74
+Revises: 4d2a8f0b7c31
+Create Date: 2026-10-18 16:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3f6c1e2b74'
+down_revision = '4d2a8f0b7c31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The primary key (model_version, movie_id, rank) is the lookup index
+    op.create_table('movie_recommendation',
+    sa.Column('model_version', sa.String(length=40), nullable=False),
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('rec_movie_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movie.id'], ),
+    sa.ForeignKeyConstraint(['rec_movie_id'], ['movie.id'], ),
+    sa.PrimaryKeyConstraint('model_version', 'movie_id', 'rank')
+    )
+
+
+def downgrade():
+    op.drop_table('movie_recommendation')
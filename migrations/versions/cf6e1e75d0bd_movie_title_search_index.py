@@ -0,0 +1,57 @@
+"""Movie title search index
+
+Revision ID: cf6e1e75d0bd
+Revises: b861402e39ca
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cf6e1e75d0bd'
+down_revision = 'b861402e39ca'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        # External-content FTS5 table over movie.title, kept in sync by triggers
+        op.execute(
+            "CREATE VIRTUAL TABLE movie_fts USING fts5("
+            "title, content='movie', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER movie_fts_ai AFTER INSERT ON movie BEGIN "
+            "INSERT INTO movie_fts(rowid, title) VALUES (new.id, new.title); END"
+        )
+        op.execute(
+            "CREATE TRIGGER movie_fts_ad AFTER DELETE ON movie BEGIN "
+            "INSERT INTO movie_fts(movie_fts, rowid, title) VALUES ('delete', old.id, old.title); END"
+        )
+        op.execute(
+            "CREATE TRIGGER movie_fts_au AFTER UPDATE OF title ON movie BEGIN "
+            "INSERT INTO movie_fts(movie_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+            "INSERT INTO movie_fts(rowid, title) VALUES (new.id, new.title); END"
+        )
+        op.execute("INSERT INTO movie_fts(movie_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        # Trigram GIN index makes ILIKE '%q%' and similarity() ranking indexable
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_movie_title_trgm ON movie USING gin (title gin_trgm_ops)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS movie_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS movie_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS movie_fts_ai")
+        op.execute("DROP TABLE IF EXISTS movie_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_movie_title_trgm")
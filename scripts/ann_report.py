@@ -0,0 +1,97 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ann import RandomProjectionLSH
+from app.services.similarity import top_k_cosine
+
+# (n_tables, n_bits, multiprobe) settings compared against the exact index
+DEFAULT_GRID = [
+    (8, 12, False),
+    (8, 12, True),
+    (16, 10, False),
+    (16, 8, False),
+    (32, 8, False),
+    (16, 8, True),
+]
+
+def movie_user_matrix(ratings_path):
+    """Movie x user rating matrix straight from ratings.csv, as train_models builds it"""
+    ratings = pd.read_csv(
+        ratings_path, usecols=['userId', 'movieId', 'rating'],
+        dtype={'userId': 'int32', 'movieId': 'int32', 'rating': 'float32'},
+    ).drop_duplicates(['userId', 'movieId'], keep='last')
+    rows, _ = pd.factorize(ratings['movieId'], sort=True)
+    cols, _ = pd.factorize(ratings['userId'], sort=True)
+    return csr_matrix((ratings['rating'].to_numpy(), (rows, cols)))
+
+def recall(exact, approx, items):
+    """Share of the positive exact top-K the approximate index matched.
+
+    An approximate neighbor counts if it scores at least the exact K-th
+    score, so ties at the boundary are not counted as misses.
+    """
+    kth = exact.scores[items, -1][:, None]
+    found = ((approx.scores[items] >= kth - 1e-6) & (approx.scores[items] > 0)).sum()
+    total = (exact.scores[items] > 0).sum()
+    return found / total if total else 1.0
+
+def report(ratings_path, k, grid, n_queries, seed):
+    matrix = movie_user_matrix(ratings_path)
+    print(f"{matrix.shape[0]:,} movies x {matrix.shape[1]:,} users, {matrix.nnz:,} ratings, K={k}")
+
+    started = time.perf_counter()
+    exact = top_k_cosine(matrix, k)
+    print(f"exact top-K build: {time.perf_counter() - started:.2f}s")
+
+    rng = np.random.default_rng(seed)
+    rated = np.flatnonzero(np.diff(matrix.indptr) > 0)
+    sample = rng.choice(rated, size=min(n_queries, rated.size), replace=False)
+
+    normed = normalize(matrix, norm='l2', axis=1).astype(np.float32)
+    latencies = []
+    for idx in sample:
+        query_started = time.perf_counter()
+        row = (normed[idx] @ normed.T).toarray().ravel()
+        np.argpartition(-row, k - 1)[:k]
+        latencies.append((time.perf_counter() - query_started) * 1000)
+    print(f"exact single-movie query: p50 {np.percentile(latencies, 50):.3f} ms, p95 {np.percentile(latencies, 95):.3f} ms")
+
+    print()
+    print(f"{'tables':>6} {'bits':>4} {'probe':>5} {'build s':>8} {'cands':>7} {'p50 ms':>7} {'p95 ms':>7} {'recall':>7}")
+    for n_tables, n_bits, multiprobe in grid:
+        started = time.perf_counter()
+        index = RandomProjectionLSH(n_tables=n_tables, n_bits=n_bits, multiprobe=multiprobe, seed=seed).fit(matrix)
+        approx = index.neighbors(k)
+        build = time.perf_counter() - started
+
+        latencies = []
+        for idx in sample:
+            query_started = time.perf_counter()
+            index.query(idx, k)
+            latencies.append((time.perf_counter() - query_started) * 1000)
+        candidates = np.mean([index.candidates(idx).size for idx in sample])
+
+        print(
+            f"{n_tables:>6} {n_bits:>4} {'yes' if multiprobe else 'no':>5} {build:>8.2f} {candidates:>7.0f} "
+            f"{np.percentile(latencies, 50):>7.3f} {np.percentile(latencies, 95):>7.3f} "
+            f"{recall(exact, approx, rated):>7.3f}"
+        )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recall vs latency of the LSH collaborative index against exact top-K cosine.')
+    parser.add_argument('--ratings', default='ratings.csv', help='Path to a ratings.csv file')
+    parser.add_argument('--k', type=int, default=20, help='Neighbors per movie')
+    parser.add_argument('--queries', type=int, default=500, help='Movies timed per setting')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    report(args.ratings, args.k, DEFAULT_GRID, args.queries, args.seed)
@@ -0,0 +1,258 @@
+"""Write a synthetic movies.csv / ratings.csv pair at MovieLens scale.
+
+    python scripts/generate_dataset.py --preset ml-25m --out-dir data/ml-25m
+    python scripts/seed.py --movies data/ml-25m/movies.csv --ratings data/ml-25m/ratings.csv
+    python -m benchmarks.run --movies data/ml-25m/movies.csv --ratings data/ml-25m/ratings.csv
+
+The files have the same columns as the bundled ones. Movie popularity
+follows a Zipf law, genres follow the bundled catalogue's frequencies and
+per-user rating counts are log-normal with a floor of 20, as in MovieLens.
+Users are split across a set of taste profiles that favour a couple of
+genres, so the collaborative model has structure to find. Ratings are
+written 1,000 users at a time; the output depends only on the scale
+arguments and --seed.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Share of movies tagged with each genre in the bundled movies.csv
+GENRE_FREQUENCIES = {
+    'Drama': 0.4476, 'Comedy': 0.3855, 'Thriller': 0.1944, 'Action': 0.1876,
+    'Romance': 0.1638, 'Adventure': 0.1296, 'Crime': 0.1231, 'Sci-Fi': 0.1006,
+    'Horror': 0.1004, 'Fantasy': 0.0800, 'Children': 0.0682, 'Animation': 0.0627,
+    'Mystery': 0.0588, 'Documentary': 0.0452, 'War': 0.0392, 'Musical': 0.0343,
+    'Western': 0.0171, 'IMAX': 0.0162, 'Film-Noir': 0.0089,
+}
+NO_GENRES = '(no genres listed)'
+NO_GENRES_SHARE = 0.0035
+
+# (movies, ratings) of the named MovieLens releases
+PRESETS = {
+    'ml-latest-small': (9_742, 100_836),
+    'ml-1m': (3_883, 1_000_209),
+    'ml-10m': (10_681, 10_000_054),
+    'ml-25m': (62_423, 25_000_095),
+}
+
+TITLE_WORDS = (
+    'American Last Night Dark Love Story Man Woman Girl Boy King Queen House Dead Day City Life '
+    'World Time Blood Black White Red Blue Big Little Lost Secret Return Star War Wild Big Good '
+    'Bad Great Death Dream Heart Home Fire Ice Moon Sun Sky Sea River Road Street Town Island '
+    'Kingdom Empire Legend Shadow Ghost Devil Angel Hunter Killer Soldier Stranger Brother Sister '
+    'Father Mother Family Friend Enemy Hero Witness Game Party Summer Winter Spring Fall Christmas '
+    'Midnight Morning Paradise Heaven Hell Journey Escape Revenge Rising Falling Silent Golden '
+    'Broken Hidden Final First Forever Never Tomorrow Yesterday Runaway Wedding Dance Song Music '
+    'Machine Ship Train Planet Space Storm Thunder Diamond Gold Silver Steel Iron Stone Glass '
+    'Mirror Window Door Garden Forest Desert Mountain Valley Ocean Harbor Bridge Tower Castle'
+).split()
+TITLE_ARTICLES = ('The', 'A', 'An')
+
+USERS_PER_BLOCK = 1000
+MIN_RATINGS_PER_USER = 20
+# Spread of the log-normal rating counts; gives MovieLens' mean ~2.3x median
+RATING_COUNT_SIGMA = 1.4
+N_PROFILES = 32
+GENRE_BOOST = 4.0
+FIRST_TIMESTAMP = 822_873_600 # 1996-01-29, the first MovieLens rating
+LAST_TIMESTAMP = 1_697_000_000
+
+
+def movie_ids(n_movies, rng):
+    """Increasing ids with small gaps, like the sparse MovieLens id space"""
+    return np.cumsum(rng.geometric(0.6, size=n_movies)).astype(np.int64)
+
+
+def random_titles(years, rng):
+    n = years.size
+    lengths = rng.choice([1, 2, 3, 4], size=n, p=[0.25, 0.4, 0.25, 0.1])
+    words = rng.choice(TITLE_WORDS, size=(n, 4))
+    articles = rng.choice(TITLE_ARTICLES, size=n, p=[0.8, 0.15, 0.05])
+    # MovieLens moves leading articles to the end: "Matrix, The (1999)"
+    with_article = rng.random(n) < 0.15
+    titles = []
+    for words_row, length, article, moved, year in zip(words, lengths, articles, with_article, years):
+        title = ' '.join(words_row[:length])
+        if moved:
+            title = f'{title}, {article}'
+        titles.append(f'{title} ({year})')
+    return titles
+
+
+def random_genres(n_movies, rng):
+    """Genre strings and the (movies x genres) membership matrix behind them"""
+    names = list(GENRE_FREQUENCIES)
+    frequencies = np.array(list(GENRE_FREQUENCIES.values()))
+    # One primary genre per movie, then independent extras, scaled so the
+    # per-genre shares stay close to the catalogue's
+    primary_share = frequencies / frequencies.sum()
+    primary = rng.choice(len(names), size=n_movies, p=primary_share)
+    extra = (frequencies - primary_share) / (1 - primary_share)
+    member = rng.random((n_movies, len(names))) < extra
+    member[np.arange(n_movies), primary] = True
+    member[rng.random(n_movies) < NO_GENRES_SHARE] = False
+
+    genres = ['|'.join(sorted(names[i] for i in np.flatnonzero(row))) or NO_GENRES for row in member]
+    return genres, member
+
+
+def generate_movies(n_movies, rng):
+    ids = movie_ids(n_movies, rng)
+    # Catalogues skew recent: release years fall off exponentially into the past
+    years = np.clip(2023 - rng.exponential(18, size=n_movies).astype(np.int64), 1902, 2023)
+    genres, member = random_genres(n_movies, rng)
+    movies = pd.DataFrame({'movieId': ids, 'title': random_titles(years, rng), 'genres': genres})
+    return movies, member
+
+
+def taste_profiles(member, zipf_exponent, rng):
+    """Cumulative sampling weights over movies for each taste profile.
+
+    Popularity is Zipf over a random ranking of the movies; each profile
+    boosts the movies in its two favourite genres.
+    """
+    n_movies, n_genres = member.shape
+    ranks = rng.permutation(n_movies) + 1
+    popularity = 1.0 / ranks ** zipf_exponent
+
+    frequencies = np.array(list(GENRE_FREQUENCIES.values()))
+    cumulative = np.empty((N_PROFILES, n_movies))
+    for profile in range(N_PROFILES):
+        favourites = rng.choice(n_genres, size=2, replace=False, p=frequencies / frequencies.sum())
+        weights = popularity * (1 + GENRE_BOOST * member[:, favourites].sum(axis=1))
+        cumulative[profile] = np.cumsum(weights)
+        cumulative[profile] /= cumulative[profile, -1]
+    return cumulative
+
+
+def rating_counts(n_users, n_ratings, n_movies, rng):
+    """Log-normal ratings per user with a floor, summing to about `n_ratings`"""
+    floor = min(MIN_RATINGS_PER_USER, n_movies)
+    extra = rng.lognormal(0, RATING_COUNT_SIGMA, size=n_users)
+    extra *= max(n_ratings - floor * n_users, 0) / extra.sum()
+    # Nobody rates more than half the catalogue
+    return np.minimum(floor + np.round(extra).astype(np.int64), max(n_movies // 2, floor))
+
+
+def sample_movies(cumulative, profiles, counts, rng):
+    """(user position, movie) pairs: `counts[i]` distinct movies for each user.
+
+    Draws with replacement from each user's profile and drops repeats,
+    drawing again for users that came up short.
+    """
+    n_movies = cumulative.shape[1]
+    users, movies = np.empty(0, np.int64), np.empty(0, np.int64)
+    missing = counts.copy()
+    for _ in range(8):
+        short = np.flatnonzero(missing > 0)
+        if not short.size:
+            break
+        draws = np.repeat(short, 2 * missing[short] + 4)
+        picks = np.empty(draws.size, np.int64)
+        uniforms = rng.random(draws.size)
+        for profile in np.unique(profiles[short]):
+            rows = profiles[draws] == profile
+            picks[rows] = np.searchsorted(cumulative[profile], uniforms[rows], side='right')
+        picks = np.minimum(picks, n_movies - 1)
+
+        users, movies = np.concatenate([users, draws]), np.concatenate([movies, picks])
+        # Dedupe, keep a random subset of each user's movies up to their count
+        keys = np.unique(users * n_movies + movies)
+        users, movies = keys // n_movies, keys % n_movies
+        order = np.lexsort((rng.random(users.size), users))
+        users, movies = users[order], movies[order]
+        starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+        ranks = np.arange(users.size) - np.repeat(starts, np.diff(np.r_[starts, users.size]))
+        keep = ranks < counts[users]
+        users, movies = users[keep], movies[keep]
+        missing = counts - np.bincount(users, minlength=counts.size)
+    return users, movies
+
+
+def rating_values(quality, user_bias, whole_stars, users, movies, rng):
+    """Half-star ratings around movie quality plus user bias.
+
+    Users flagged `whole_stars` round to whole stars, which is why half
+    stars are rarer than whole ones in MovieLens.
+    """
+    latent = quality[movies] + user_bias[users] + rng.normal(0, 0.85, size=users.size)
+    values = np.clip(np.round(latent * 2) / 2, 0.5, 5.0)
+    rounded = np.clip(np.round(latent), 1.0, 5.0)
+    return np.where(whole_stars[users], rounded, values)
+
+
+def timestamps(users, first_seen, active_days, rng):
+    offsets = rng.random(users.size) * active_days[users] * 86400
+    return np.minimum(first_seen[users] + offsets.astype(np.int64), LAST_TIMESTAMP)
+
+
+def generate(out_dir, n_movies, n_ratings, n_users=None, zipf_exponent=1.0, seed=0):
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    n_users = n_users or max(1, n_ratings // 155)
+
+    movies, member = generate_movies(n_movies, rng)
+    movies_path = os.path.join(out_dir, 'movies.csv')
+    movies.to_csv(movies_path, index=False)
+    print(f"Wrote {n_movies:,} movies to {movies_path}")
+
+    cumulative = taste_profiles(member, zipf_exponent, rng)
+    quality = rng.normal(3.45, 0.45, size=n_movies)
+    counts = rating_counts(n_users, n_ratings, n_movies, rng)
+    profiles = rng.integers(N_PROFILES, size=n_users)
+    user_bias = rng.normal(0, 0.35, size=n_users)
+    whole_stars = rng.random(n_users) < 0.4
+    first_seen = rng.integers(FIRST_TIMESTAMP, LAST_TIMESTAMP, size=n_users)
+    active_days = rng.exponential(120, size=n_users)
+
+    ratings_path = os.path.join(out_dir, 'ratings.csv')
+    written = 0
+    with open(ratings_path, 'w', newline='') as f:
+        f.write('userId,movieId,rating,timestamp\n')
+        for block, start in enumerate(range(0, n_users, USERS_PER_BLOCK)):
+            stop = min(start + USERS_PER_BLOCK, n_users)
+            # A generator per block keeps the output independent of memory settings
+            block_rng = np.random.default_rng([seed, block])
+            users, movies_idx = sample_movies(cumulative, profiles[start:stop], counts[start:stop], block_rng)
+            users += start
+
+            frame = pd.DataFrame({
+                'userId': users + 1,
+                'movieId': movies['movieId'].to_numpy()[movies_idx],
+                'rating': rating_values(quality, user_bias, whole_stars, users, movies_idx, block_rng),
+                'timestamp': timestamps(users, first_seen, active_days, block_rng),
+            }).sort_values(['userId', 'timestamp'], kind='stable')
+            frame.to_csv(f, header=False, index=False, float_format='%.1f')
+
+            written += len(frame)
+            if block % 20 == 0 or stop == n_users:
+                print(f"  ... {written:,} ratings from {stop:,} users")
+
+    print(f"Wrote {written:,} ratings to {ratings_path} in {time.perf_counter() - started:.2f}s")
+    return movies_path, ratings_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic movies.csv / ratings.csv pair.')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default=None, help='Movie and rating counts of a MovieLens release')
+    parser.add_argument('--movies', type=int, default=None, help='Number of movies (overrides --preset)')
+    parser.add_argument('--ratings', type=int, default=None, help='Approximate number of ratings (overrides --preset)')
+    parser.add_argument('--users', type=int, default=None, help='Number of users (default: ratings / 155)')
+    parser.add_argument('--zipf', type=float, default=1.0, help='Zipf exponent of movie popularity')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out-dir', default='data/synthetic', help='Directory for movies.csv and ratings.csv')
+    args = parser.parse_args()
+
+    n_movies, n_ratings = PRESETS[args.preset or 'ml-latest-small']
+    generate(
+        args.out_dir,
+        args.movies or n_movies,
+        args.ratings or n_ratings,
+        n_users=args.users,
+        zipf_exponent=args.zipf,
+        seed=args.seed,
+    )
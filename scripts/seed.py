@@ -1,6 +1,10 @@
+import argparse
+import io
 import os
-import pandas as pd
 import sys
+import time
+
+import pandas as pd
 
 # Add the parent directory to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -8,9 +12,97 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app import create_app, db
 from app.models import Movie, Rating, User
 
-app = create_app()
+MOVIE_DTYPES = {'movieId': 'int32', 'title': 'string', 'genres': 'string'}
+RATING_DTYPES = {'userId': 'int32', 'movieId': 'int32', 'rating': 'float32', 'timestamp': 'int64'}
+
+# Connection-scoped SQLite settings for a one-off bulk load: no fsync per
+# commit and a large page cache. The connection goes back to the pool
+# afterwards, so the previous values are restored once the load commits.
+SQLITE_BULK_PRAGMAS = {
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+    'cache_size': '-262144',
+}
+
+class Throughput:
+    """Row counter that reports rows/second per table"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def add(self, rows):
+        self.rows += rows
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.rows / elapsed if elapsed > 0 else float('inf')
+        print(f"Inserted {self.rows:,} {self.name} in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+def bulk_insert(conn, table, frame):
+    """Insert a DataFrame chunk through the fastest bulk path of the dialect.
 
-def seed_data():
+    Postgres (psycopg2) streams the chunk with COPY; every other backend
+    gets one Core executemany per chunk.
+    """
+    if frame.empty:
+        return
+    if conn.dialect.name == 'postgresql':
+        cursor = conn.connection.cursor()
+        if hasattr(cursor, 'copy_expert'):
+            buffer = io.StringIO()
+            frame.to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            columns = ', '.join(f'"{column}"' for column in frame.columns)
+            cursor.copy_expert(f'COPY "{table.name}" ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+            return
+    conn.execute(table.insert(), frame.to_dict('records'))
+
+def load_movies(conn, path, chunksize):
+    progress = Throughput('movies')
+    for chunk in pd.read_csv(path, dtype=MOVIE_DTYPES, chunksize=chunksize):
+        frame = pd.DataFrame({
+            'id': chunk['movieId'].astype('int64'),
+            'title': chunk['title'].astype(object),
+            'genres': chunk['genres'].astype(object).where(chunk['genres'].notna(), None),
+        })
+        bulk_insert(conn, Movie.__table__, frame)
+        progress.add(len(frame))
+    progress.report()
+
+def load_ratings(conn, path, chunksize):
+    """Stream ratings, creating a placeholder user the first time an id appears"""
+    ratings = Throughput('ratings')
+    seen_users = set()
+
+    for chunk in pd.read_csv(path, dtype=RATING_DTYPES, chunksize=chunksize):
+        # Users first so the rating foreign keys are satisfied
+        user_ids = pd.unique(chunk['userId'])
+        new_ids = [int(uid) for uid in user_ids if uid not in seen_users]
+        seen_users.update(new_ids)
+        bulk_insert(conn, User.__table__, pd.DataFrame({
+            'id': new_ids,
+            'username': [f'user_{uid}' for uid in new_ids],
+            'email': [f'user_{uid}@example.com' for uid in new_ids],
+            'password_hash': 'dummy_hash',
+        }))
+
+        timestamps = pd.to_datetime(chunk['timestamp'], unit='s')
+        bulk_insert(conn, Rating.__table__, pd.DataFrame({
+            'user_id': chunk['userId'].astype('int64'),
+            'movie_id': chunk['movieId'].astype('int64'),
+            'rating': chunk['rating'].astype('float64'),
+            'timestamp': timestamps.astype(object),
+        }))
+        ratings.add(len(chunk))
+        print(f"  ... {ratings.rows:,} ratings")
+
+    print(f"Created {len(seen_users):,} users")
+    ratings.report()
+
+def seed_data(movies_path='movies.csv', ratings_path='ratings.csv', chunksize=50000, app=None):
+    app = app or create_app()
     with app.app_context():
         # Create tables if they don't exist (though migrate should handle this, good for dev)
         db.create_all()
@@ -18,64 +110,36 @@ def seed_data():
         if Movie.query.first():
             print("Database already seeded. Skipping...")
             return
+        db.session.remove()
+
+        started = time.perf_counter()
+        with db.engine.connect() as conn:
+            previous = {}
+            if conn.dialect.name == 'sqlite':
+                for name, value in SQLITE_BULK_PRAGMAS.items():
+                    previous[name] = conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+                    conn.exec_driver_sql(f'PRAGMA {name} = {value}')
+                conn.commit() # Close the autobegun transaction; nothing was written
+            try:
+                # One transaction for the whole load
+                with conn.begin():
+                    print("Loading Movies...")
+                    load_movies(conn, movies_path, chunksize)
+
+                    print("Loading Ratings...")
+                    load_ratings(conn, ratings_path, chunksize)
+            finally:
+                # synchronous cannot change inside a transaction, so after it
+                for name, value in previous.items():
+                    conn.exec_driver_sql(f'PRAGMA {name} = {value}')
+                conn.commit()
 
-        print("Loading Movies...")
-        movies_df = pd.read_csv('movies.csv')
-        
-        # Bulk Insert Movies
-        movies_to_insert = []
-        for _, row in movies_df.iterrows():
-            movie = Movie(
-                id=int(row['movieId']),
-                title=row['title'],
-                genres=row['genres']
-            )
-            movies_to_insert.append(movie)
-        
-        db.session.add_all(movies_to_insert)
-        db.session.commit()
-        print(f"Inserted {len(movies_to_insert)} movies.")
-
-        print("Loading Ratings (this might take a moment)...")
-        ratings_df = pd.read_csv('ratings.csv')
-        
-        # We need to create Users first to satisfy ForeignKey
-        unique_user_ids = ratings_df['userId'].unique()
-        users_to_insert = []
-        print(f"Creating {len(unique_user_ids)} dummy users...")
-        for uid in unique_user_ids:
-            user = User(
-                id=int(uid),
-                username=f'user_{uid}',
-                email=f'user_{uid}@example.com',
-                password_hash='dummy_hash' 
-            )
-            users_to_insert.append(user)
-        
-        db.session.add_all(users_to_insert)
-        db.session.commit()
-        print("Users created.")
-
-        # Bulk Insert Ratings
-        # Only take a subset if it's too large for dev, but 2.5MB is fine.
-        ratings_to_insert = []
-        for _, row in ratings_df.iterrows():
-            rating = Rating(
-                user_id=int(row['userId']),
-                movie_id=int(row['movieId']),
-                rating=float(row['rating'])
-                # timestamp is omitted for simplicity or could be converted
-            )
-            ratings_to_insert.append(rating)
-        
-        # Batch insert for performance
-        batch_size = 1000
-        for i in range(0, len(ratings_to_insert), batch_size):
-            db.session.add_all(ratings_to_insert[i:i+batch_size])
-            db.session.commit()
-            print(f"Inserted ratings batch {i} to {i+batch_size}")
-
-        print("Seeding Complete!")
+        print(f"Seeding Complete in {time.perf_counter() - started:.2f}s!")
 
 if __name__ == '__main__':
-    seed_data()
+    parser = argparse.ArgumentParser(description='Bulk load movies.csv / ratings.csv into the database.')
+    parser.add_argument('--movies', default='movies.csv', help='Path to a movies.csv file')
+    parser.add_argument('--ratings', default='ratings.csv', help='Path to a ratings.csv file')
+    parser.add_argument('--chunksize', type=int, default=50000, help='Rows read and inserted per batch')
+    args = parser.parse_args()
+    seed_data(args.movies, args.ratings, args.chunksize)